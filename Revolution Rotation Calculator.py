@@ -1,9 +1,40 @@
 #!/usr/bin/env python3
+import _thread
+import argparse
+import asyncio
+import cProfile
+import collections
+import contextlib
+import hashlib
+import heapq
+import http.server
+import io
 import itertools
+import json
 import math
+import multiprocessing
+import multiprocessing.managers
+import os
+import pstats
+import queue
+import random
+import signal
+import sqlite3
 import sys
+import threading
 import time
-from typing import List, Dict, Tuple
+import urllib.error
+import urllib.request
+from typing import List, Dict, Tuple, Optional, Callable, Iterator
+
+try:  # NumPy is only needed by the batch engine
+    import numpy as np
+except ImportError:
+    np = None
+try:  # Only used to measure peak memory in --suite, and missing on Windows
+    import resource
+except ImportError:
+    resource = None
 
 abilities: List[str] = ["ASPHYXIATE",
                         "ASSAULT",
@@ -798,6 +829,13 @@ aoe: List[str] = ["BLADED DIVE",
                   "RICOCHET",
                   "TSUNAMI"]
 
+# The tables above as they are before prepare_tables() cuts them down to the selected abilities and scale_aoe() scales
+# them, so that one process can set up more than one configuration
+base_tables: Dict[str, object] = {name: globals()[name].copy() for name in
+                                  ("ability_damage", "ability_cooldown", "ability_type", "ability_time",
+                                   "ability_ready", "walking_bleeds", "bleeds", "buff_time", "buff_effect", "punishing",
+                                   "debilitating", "crit_boost", "special_bleeds", "special_abilities", "aoe")}
+
 start_adrenaline: int
 gain: int
 attack_speed: str
@@ -805,236 +843,479 @@ activate_bleeds: bool
 my_abilities: List[str]
 auto_adrenaline: int
 cycle_duration: float
+aoe_average_targets_hit: float
+ability_path: List[str]
+# Pairs of abilities where the first must have a higher priority than the second in every bar searched (--dominance)
+dominance: List[Tuple[str, str]] = []
 
+# The game runs on 0.6 second ticks. The simulator counts time in ticks and damage in tenths of a percent, using the
+# tables below which are converted from the ones above once the abilities are known
+tick: float = 0.6
+ability_ticks: Dict[str, int]
+cooldown_ticks: Dict[str, int]
+buff_ticks: Dict[str, int]
+bleed_ticks: Dict[str, int]
+damage_tenths: Dict[str, float]
+attack_speed_ticks: int
+cycle_ticks: float
 
-# Will return how much damage an ability bar will do over a given time
-def ability_rotation(permutation: List[str]) -> float:
-    # Will check if an auto attack is needed to be used
-    def auto_available() -> bool:
-        for ability in track_cooldown:
-            if (ability_cooldown[ability] - track_cooldown[ability]) < attack_speed_cooldowns[attack_speed]:
-                return False
-        return True
 
-    # Decreases Cooldowns of abilities and buffs as well as modifying and damage multipliers
-    def adjust_cooldowns(current_buff: float, adrenaline: int, cooldown_time: float) -> float:
-        for ability in track_cooldown:
-            track_cooldown[ability] += cooldown_time
-            track_cooldown[ability] = round(track_cooldown[ability], 1)
-            if track_cooldown[ability] >= ability_cooldown[ability]:
-                track_cooldown[ability] = 0
-                if ability in threshold_ability_list:
-                    if adrenaline >= 50:
-                        ability_ready[ability] = True
-                elif ability in igneous_ability_list:
-                    if adrenaline >= 60:
-                        ability_ready[ability] = True
-                elif ability in ultimate_ability_list:
-                    if adrenaline == 100:
-                        ability_ready[ability] = True
-                else:
-                    ability_ready[ability] = True
-        for ability in permutation:
-            if ability in track_cooldown and track_cooldown[ability] == 0:
-                del track_cooldown[ability]
-        for ability in track_buff:
-            track_buff[ability] += cooldown_time
-            track_buff[ability] = round(track_buff[ability], 1)
-            if track_buff[ability] >= buff_time[ability]:
-                track_buff[ability] = 0
-        for ability in permutation:
-            if ability in track_buff and track_buff[ability] == 0:
-                del track_buff[ability]
-                if (ability not in punishing) and (ability in buff_effect):
-                    current_buff = current_buff / buff_effect[ability]
-        return current_buff
+# The selected abilities compiled into flat lists indexed by their position in my_abilities, built once the tables
+# above are known. Sets of abilities are bitmasks where bit i stands for my_abilities[i], so the simulator looks
+# everything up by index and tests readiness, cooldowns and buffs with bit operations
+class AbilityTable:
+    __slots__ = ("names", "index", "damage", "ticks", "cooldown", "adrenaline", "channel", "bleed", "walking_bleed",
+                 "buff", "effect", "initially_ready", "basic", "threshold", "igneous", "ultimate", "bleeds",
+                 "special_bleeds", "walking_bleeds", "crit_boost", "binds", "debilitating", "punishing", "boosting",
+                 "storm_shards", "shatter", "smoke_tendrils", "ordered")
 
-    # Determines if enemy vulnerable to extra damage due to stuns or binds
-    def buff_available() -> bool:
-        for ability in debilitating:
-            if ability in track_buff:
-                return True
-        return False
 
-    def modify_time(cycle_duration: float, time_elapsed: float, ability: str) -> float:
-        if (ability in bleeds) and (ability != "SHADOW TENDRILS") and (
-                    (cycle_duration - time_elapsed) < bleeds[ability]):
-            return (cycle_duration - time_elapsed) / bleeds[ability]
+table: AbilityTable
+
+
+# Holds everything that changes while an ability bar is being used, so a rotation can be paused when the next ability
+# depends on priorities that have not been decided yet and resumed (or copied) later. Time is counted in game ticks
+# and damage in tenths of a percent. ready, cooling and buffed are bitmasks of table indices; cooldown_left and
+# buff_left hold the ticks left for the abilities in cooling and buffed, and buff_order the buffed abilities in the
+# order they were used. ability_path is None when the rotation is not being recorded
+class Rotation:
+    __slots__ = ("damage_dealt", "current_buff", "time_elapsed", "shards", "adrenaline", "ready", "cooling",
+                 "cooldown_left", "buffed", "buff_left", "buff_order", "ability_path")
+
+    def copy(self) -> "Rotation":
+        clone = Rotation()
+        clone.damage_dealt = self.damage_dealt
+        clone.current_buff = self.current_buff
+        clone.time_elapsed = self.time_elapsed
+        clone.shards = self.shards
+        clone.adrenaline = self.adrenaline
+        clone.ready = self.ready
+        clone.cooling = self.cooling
+        clone.cooldown_left = list(self.cooldown_left)
+        clone.buffed = self.buffed
+        clone.buff_left = list(self.buff_left)
+        clone.buff_order = list(self.buff_order)
+        clone.ability_path = list(self.ability_path) if self.ability_path is not None else None
+        return clone
+
+
+# Remembers how much damage rotations dealt from a decision point to their end, so bars that reach the same point do
+# not simulate the rest again (--transpositions). A point is keyed by everything the rest of a rotation depends on
+# apart from the priorities: time, adrenaline, shards, buffs, cooldowns and the ready abilities. Damage does not depend
+# on the damage dealt before, so it is left out. Rather than the priorities themselves, each entry keeps the decisions
+# the rotation went on to make, as the ability used and the other abilities that were ready. Any bar that makes the same
+# decisions, with each ability used ranked above the others that were ready, deals the same damage from there, however
+# the rest of its priorities are ordered. Up to variants entries with different decisions are kept for a point, and the
+# least recently used points are evicted once the entries take up more than memory bytes (as estimated by their size)
+class TranspositionTable:
+    __slots__ = ("memory", "used", "points", "variants", "lookups", "hits", "evictions", "config")
+
+    def __init__(self, memory: int, config: str, variants: int = 4) -> None:
+        self.memory = memory
+        self.used: int = 0
+        self.points: "collections.OrderedDict[tuple, list]" = collections.OrderedDict()
+        self.variants = variants
+        self.lookups: int = 0
+        self.hits: int = 0
+        self.evictions: int = 0
+        self.config = config
+
+    # Returns the damage dealt from point on by the bar whose higher priorities are before[i] for each ability i (as
+    # bits of table indices), with the decisions it makes from there, or None if the point has not been seen with them
+    def lookup(self, point: tuple, before: List[int]) -> Optional[Tuple[int, Tuple[Tuple[int, int], ...]]]:
+        self.lookups += 1
+        entries: Optional[list] = self.points.get(point)
+        if entries is not None:
+            for damage_dealt, decisions in entries[1]:
+                for ability, others in decisions:
+                    if others & before[ability]:
+                        break
+                else:
+                    self.hits += 1
+                    self.points.move_to_end(point)
+                    return damage_dealt, decisions
+        return None
+
+    def store(self, point: tuple, damage_dealt: int, decisions: Tuple[Tuple[int, int], ...]) -> None:
+        entries: Optional[list] = self.points.get(point)
+        if entries is None:
+            # About 100 bytes more for the dictionary and its order
+            size: int = sys.getsizeof(point) + sum(sys.getsizeof(part) for part in point) + 100
+            entries = [size, []]
+            self.points[point] = entries
+            self.used += entries[0]
         else:
-            if (ability not in special_abilities) and (ability_time[ability] > 1.8) and (
-                        (cycle_duration - time_elapsed) < ability_time[ability]):
-                return (cycle_duration - time_elapsed) / ability_time[ability]
-        return 1
+            self.points.move_to_end(point)
+        # The decisions themselves are shared between the points of a rotation, each entry holds references to them
+        # and is charged for about one decision
+        size = 216 + 8 * len(decisions)
+        entries[1].append((damage_dealt, decisions))
+        if len(entries[1]) > self.variants:
+            size -= 216 + 8 * len(entries[1].pop(0)[1])
+        entries[0] += size
+        self.used += size
+        while self.used > self.memory and len(self.points) > 1:
+            self.used -= self.points.popitem(last=False)[1][0]
+            self.evictions += 1
 
+
+# Counts of what the simulator does while --instrument is on, None otherwise so that the simulator only pays for a
+# check: calls of advance_rotation(), iterations of its main loop, abilities used, auto attacks, idle ticks waiting for
+# an ability, calls of adjust_cooldowns() and the cooldowns and buffs those calls went through
+counters: Optional[Dict[str, int]] = None
+counter_names: Tuple[str, ...] = ("calls", "iterations", "abilities", "autos", "idle", "adjust_cooldowns", "scanned")
+
+
+# Formats a step of a rotation the same way for every engine
+def path_entry(ability: str, damage_dealt: int, time_elapsed: int, adrenaline: int) -> str:
+    return f"{ability} D: {damage_dealt / 10} T: {round(time_elapsed * tick, 1)} A: {adrenaline}"
+
+
+# Starts a new rotation, which always opens with an auto attack. Searches leave record off, formatting the steps of
+# every rotation is only worth it for the bars that are shown in the end
+def start_rotation(record: bool = True) -> Rotation:
+    rotation = Rotation()
+    ready: int = table.initially_ready
     # --- Defining Variables --- #
-    damage_dealt: float = 0
-    current_buff: float = 1
-    time_elapsed: float = 0
-    shards: float = 0
+    damage_dealt: int = 0
+    time_elapsed: int = 0
     adrenaline = start_adrenaline
     # --- Calculations begin here --- #
-    ability_path.append(f"AUTO D: {round(damage_dealt, 1)} T: {round(time_elapsed, 1)} A: {adrenaline}")
-    damage_dealt += 50
+    rotation.ability_path = [path_entry("AUTO", damage_dealt, time_elapsed, adrenaline)] if record is True else None
+    damage_dealt += 500
     adrenaline += auto_adrenaline
     if adrenaline >= 100:
         adrenaline = 100
-        for tracked_ability in ultimate_ability_list:
-            ability_ready[tracked_ability] = True
-        for tracked_ability in igneous_ability_list:
-            ability_ready[tracked_ability] = True
-        for tracked_ability in threshold_ability_list:
-            ability_ready[tracked_ability] = True
+        ready |= table.ultimate | table.igneous | table.threshold
     elif adrenaline >= 60:
-        for tracked_ability in igneous_ability_list:
-            ability_ready[tracked_ability] = True
-        for tracked_ability in threshold_ability_list:
-            ability_ready[tracked_ability] = True
+        ready |= table.igneous | table.threshold
     elif adrenaline >= 50:
-        for tracked_ability in threshold_ability_list:
-            ability_ready[tracked_ability] = True
+        ready |= table.threshold
     elif adrenaline < 0:
         adrenaline = 0
-    time_elapsed += 0.6
-    time_elapsed = round(time_elapsed, 1)
-    while time_elapsed < cycle_duration:
+    time_elapsed += 1
+    rotation.damage_dealt = damage_dealt
+    rotation.current_buff = 1
+    rotation.time_elapsed = time_elapsed
+    rotation.shards = 0
+    rotation.adrenaline = adrenaline
+    rotation.ready = ready
+    rotation.cooling = 0
+    rotation.cooldown_left = [0] * len(table.names)
+    rotation.buffed = 0
+    rotation.buff_left = [0] * len(table.names)
+    rotation.buff_order = []
+    return rotation
+
+
+# Continues a rotation until cycle_ticks is reached, using the first ready ability in permutation (a tuple of table
+# indices) each time. If permutation only holds the first few priorities of a bar (complete is False), the rotation is
+# paused as soon as the only ready abilities are ones without a priority yet. With single, the rotation is also paused
+# at the first decision after one ability has been used. With memo (for rotations that are not recorded, and without
+# single), the rest of the rotation is looked up at each decision where more than one ability is ready, once it has
+# been simulated from there before, leaving only damage_dealt up to date. The rotation is also paused at the first
+# decision from tick until onwards. With horizon, the rotation ends at that tick instead of cycle_ticks. Returns True
+# once the rotation has finished
+def advance_rotation(rotation: Rotation, permutation: Tuple[int, ...], complete: bool = True,
+                     single: bool = False, memo: Optional[TranspositionTable] = None, until: float = math.inf,
+                     horizon: Optional[float] = None, decided: Optional[List[int]] = None) -> bool:
+    names: List[str] = table.names
+    end: float = cycle_ticks if horizon is None else horizon
+    damage: List[float] = table.damage
+    ticks: List[int] = table.ticks
+    channel: List[int] = table.channel
+    bleed: List[int] = table.bleed
+    effect: List[Optional[float]] = table.effect
+    basic: int = table.basic
+    gated: int = table.threshold | table.igneous | table.ultimate
+    crit_boost_mask: int = table.crit_boost
+    binds_mask: int = table.binds
+    walking_mask: int = table.walking_bleeds
+    cooldown_left: List[int] = rotation.cooldown_left
+    buff_left: List[int] = rotation.buff_left
+    buff_order: List[int] = rotation.buff_order
+    ability_path: Optional[List[str]] = rotation.ability_path
+    ready: int = rotation.ready
+    cooling: int = rotation.cooling
+    buffed: int = rotation.buffed
+    counts: Optional[Dict[str, int]] = counters
+    if counts is not None:
+        counts["calls"] += 1
+
+    # Abilities whose type allows them to be used with this much adrenaline
+    def usable(adrenaline: int) -> int:
+        if adrenaline == 100:
+            return basic | gated
+        elif adrenaline >= 60:
+            return basic | table.igneous | table.threshold
+        elif adrenaline >= 50:
+            return basic | table.threshold
+        return basic
+
+    # Will check if an auto attack is needed to be used
+    def auto_available() -> bool:
+        remaining: int = cooling
+        while remaining:
+            bit: int = remaining & -remaining
+            remaining ^= bit
+            if cooldown_left[bit.bit_length() - 1] < attack_speed_ticks:
+                return False
+        return True
+
+    # Decreases Cooldowns of abilities and buffs as well as modifying and damage multipliers. Buffs run out in the
+    # order of my_abilities
+    def adjust_cooldowns(current_buff: float, adrenaline: int, cooldown_time: int) -> float:
+        nonlocal ready, cooling, buffed
+        if counts is not None:
+            counts["adjust_cooldowns"] += 1
+            counts["scanned"] += bin(cooling).count("1") + bin(buffed).count("1")
+        remaining: int = cooling
+        while remaining:
+            bit: int = remaining & -remaining
+            remaining ^= bit
+            index: int = bit.bit_length() - 1
+            cooldown_left[index] -= cooldown_time
+            if cooldown_left[index] <= 0:
+                cooling ^= bit
+                ready |= bit & usable(adrenaline)
+        remaining = buffed
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            index = bit.bit_length() - 1
+            buff_left[index] -= cooldown_time
+            if buff_left[index] <= 0:
+                buffed ^= bit
+                buff_order.remove(index)
+                if bit & table.boosting:
+                    current_buff = current_buff / effect[index]
+        return current_buff
+
+    def modify_time(cycle_ticks: float, time_elapsed: int, index: int) -> float:
+        if (cycle_ticks - time_elapsed) < bleed[index]:
+            return (cycle_ticks - time_elapsed) / bleed[index]
+        elif (cycle_ticks - time_elapsed) < channel[index]:
+            return (cycle_ticks - time_elapsed) / channel[index]
+        return 1
+
+    # --- Picking up where the rotation was left --- #
+    damage_dealt: int = rotation.damage_dealt
+    current_buff: float = rotation.current_buff
+    time_elapsed: int = rotation.time_elapsed
+    shards: int = rotation.shards
+    adrenaline: int = rotation.adrenaline
+    finished: bool = True
+    # With memo, the decision points of the rotation are kept with the damage dealt before them and the decisions made
+    # so far, and before[i] holds the abilities ranked above ability i
+    visited: List[Tuple[tuple, int, int]] = []
+    decisions: List[Tuple[int, int]] = []
+    # Abilities without a priority yet rank below every other, and the rotation would pause rather than use them, so
+    # each decision also carries bit len(names) which only they have in before
+    before: List[int] = [-1] * len(names)
+    if memo is not None:
+        higher: int = 0
+        for ability in permutation:
+            before[ability] = higher
+            higher |= 1 << ability
+    while time_elapsed < end:
+        if time_elapsed >= until:
+            finished = False
+            break
+        if counts is not None:
+            counts["iterations"] += 1
+        if memo is not None and ready & (ready - 1):
+            remaining: int = cooling
+            cooldowns: List[int] = []
+            while remaining:
+                bit = remaining & -remaining
+                remaining ^= bit
+                cooldowns.append(cooldown_left[bit.bit_length() - 1])
+            point: tuple = (time_elapsed, adrenaline, shards, current_buff, ready, cooling, tuple(cooldowns),
+                            tuple(buff_order), tuple(buff_left[index] for index in buff_order))
+            found: Optional[Tuple[int, Tuple[Tuple[int, int], ...]]] = memo.lookup(point, before)
+            if found is not None:
+                damage_dealt += found[0]
+                decisions += found[1]
+                break
+            visited.append((point, damage_dealt, len(decisions)))
+        if decided is not None:
+            # --- Uses the one ready ability that no ready ability is decided to rank above, or pauses when there is
+            # more than one --- #
+            free: List[int] = []
+            remaining = ready
+            while remaining and len(free) < 2:
+                bit = remaining & -remaining
+                remaining ^= bit
+                if decided[bit.bit_length() - 1] & ready == 0:
+                    free.append(bit.bit_length() - 1)
+            if len(free) > 1:
+                finished = False
+                break
+            permutation = tuple(free)
         for ability in permutation:
-            # Checks if ability can be used TODO: Check if this is necessary
-            if time_elapsed < cycle_duration and ability_ready[ability] is True:
-                ability_ready[ability] = False
+            # Checks if ability can be used
+            if (ready >> ability) & 1:
+                bit: int = 1 << ability
+                ready ^= bit
+                if memo is not None:
+                    decisions.append((ability, ready | 1 << len(names)))
+                if counts is not None:
+                    counts["abilities"] += 1
                 # --- Modifying adrenaline as required --- #
-                ability_path.append(f"{ability} D: {round(damage_dealt, 1)} T: {round(time_elapsed, 1)}"
-                                    f" A: {adrenaline}")
-                if ability in basic_ability_list:
-                    adrenaline += 9
-                elif ability in threshold_ability_list:
-                    adrenaline -= 15
-                elif ability in igneous_ability_list:
-                    adrenaline -= 60
-                else:
+                if ability_path is not None:
+                    ability_path.append(path_entry(names[ability], damage_dealt, time_elapsed, adrenaline))
+                if bit & table.ultimate:
                     adrenaline = gain
+                else:
+                    adrenaline += table.adrenaline[ability]
                 if adrenaline > 100:
                     adrenaline = 100
                 # --- Adding shards if they are used, or using them if activated --- #
-                if ability == "STORM SHARDS":
+                if ability == table.storm_shards:
                     if shards < 10:
                         shards += 1
-                elif ability == "SHATTER":
-                    damage_dealt += round(shards * 85, 1)
+                elif ability == table.shatter:
+                    damage_dealt += shards * 850
                     shards = 0
                     # --- Calculating how much damage abilities should do --- #
                 more_binds: bool = False
                 altered_bleeds: bool = False
-                modified_damage: bool = False
                 damage_multiplier: float = 1  # Multiplier for damage due to damage boosting abilities
                 bleed_multiplier: float = 1  # Multiplier in case target is bound (and bind about to run out)
-                for tracked_ability in track_buff:
-                    if tracked_ability in crit_boost:
-                        if ((buff_time[tracked_ability] - track_buff[tracked_ability]) < ability_time[ability]) and (
-                                    (ability not in special_abilities) and (ability_time[ability] > 1.8)):
-                            damage_multiplier *= (
-                                (((buff_time[tracked_ability] - track_buff[tracked_ability]) / ability_time[ability]) *
-                                 (buff_effect[tracked_ability] - 1)) + 1)
+                for tracked_ability in buff_order:
+                    if (crit_boost_mask >> tracked_ability) & 1:
+                        if buff_left[tracked_ability] < channel[ability]:
+                            damage_multiplier *= (((buff_left[tracked_ability] / channel[ability]) *
+                                                   (effect[tracked_ability] - 1)) + 1)
                         else:
-                            damage_multiplier *= buff_effect[tracked_ability]
-                    elif (tracked_ability in binds) and (activate_bleeds is True) and (ability in walking_bleeds) and (
-                                len(debilitating) > 0):
-                        if (more_binds is False) and (
-                                        buff_time[tracked_ability] - track_buff[tracked_ability] < bleeds[ability]):
-                            bleed_multiplier = walking_bleeds[ability] * (
-                                1 + (buff_time[tracked_ability] - track_buff[tracked_ability]) / bleeds[ability])
+                            damage_multiplier *= effect[tracked_ability]
+                    elif (binds_mask >> tracked_ability) & 1 and bit & walking_mask and table.debilitating:
+                        if (more_binds is False) and (buff_left[tracked_ability] < bleed[ability]):
+                            bleed_multiplier = table.walking_bleed[ability] * (
+                                1 + buff_left[tracked_ability] / bleed[ability])
                         else:
                             bleed_multiplier = 1
                             more_binds = True
                         altered_bleeds = True
-                if (activate_bleeds is True) and (ability in walking_bleeds) and (altered_bleeds is False):
-                    bleed_multiplier = walking_bleeds[ability]
-                time_multiplier = modify_time(cycle_duration, time_elapsed, ability)
-                if ability in bleeds:
-                    if ability in special_bleeds:
-                        if ability == "SMOKE TENDRILS":
-                            damage_dealt += (ability_damage[ability] * damage_multiplier)
+                if bit & walking_mask and (altered_bleeds is False):
+                    bleed_multiplier = table.walking_bleed[ability]
+                time_multiplier = modify_time(end, time_elapsed, ability)
+                if bit & table.bleeds:
+                    ability_damage: float = damage[ability]
+                    if bit & table.special_bleeds:
+                        if ability == table.smoke_tendrils:
+                            damage_dealt += round(ability_damage * damage_multiplier)
                         else:
-                            ability_damage[ability] = ((112.8 * damage_multiplier) + 313.33)
-                            modified_damage = True
-                    damage_dealt += round(ability_damage[ability] * bleed_multiplier * time_multiplier, 1)
-                    if modified_damage is True:
-                        ability_damage[ability] = 426.13
-                elif (ability in punishing) and (buff_available() is True):
-                    damage_dealt += round(ability_damage[ability] * buff_effect[ability] * damage_multiplier *
-                                          time_multiplier, 1)
+                            ability_damage = (1128 * damage_multiplier) + 3133.3
+                    damage_dealt += round(ability_damage * bleed_multiplier * time_multiplier)
+                elif bit & table.punishing and buffed & table.debilitating:
+                    damage_dealt += round(damage[ability] * effect[ability] * damage_multiplier * time_multiplier)
                 else:
-                    damage_dealt += round(ability_damage[ability] * damage_multiplier * time_multiplier, 1)
+                    damage_dealt += round(damage[ability] * damage_multiplier * time_multiplier)
                 # --- Increasing rotation duration and managing cooldowns --- #
-                time_elapsed += ability_time[ability]
-                time_elapsed = round(time_elapsed, 1)
-                track_cooldown[ability] = float(0)
-                if ability in buff_time and ability not in punishing:
-                    track_buff[ability] = 0
-                    if ability in buff_effect:
-                        current_buff = current_buff * buff_effect[ability]
+                time_elapsed += ticks[ability]
+                cooling |= bit
+                cooldown_left[ability] = table.cooldown[ability]
+                if table.buff[ability] > 0:
+                    if not buffed & bit:
+                        buff_order.append(ability)
+                    buffed |= bit
+                    buff_left[ability] = table.buff[ability]
+                    if bit & table.boosting:
+                        current_buff = current_buff * effect[ability]
                 # Will also manage cooldowns
-                current_buff = adjust_cooldowns(current_buff, adrenaline, ability_time[ability])
+                current_buff = adjust_cooldowns(current_buff, adrenaline, ticks[ability])
+                if single is True:
+                    permutation = ()  # The next decision is left to the caller
                 break
-        # --- Determines whether thresholds or ultimates may be used --- #
-        if time_elapsed < cycle_duration:
-            if adrenaline == 100:
-                for tracked_ability in (a for a in ultimate_ability_list if a not in track_cooldown):
-                    ability_ready[tracked_ability] = True
-                for tracked_ability in (a for a in igneous_ability_list if a not in track_cooldown):
-                    ability_ready[tracked_ability] = True
-                for tracked_ability in (a for a in threshold_ability_list if a not in track_cooldown):
-                    ability_ready[tracked_ability] = True
-            elif adrenaline >= 60:
-                for tracked_ability in (a for a in igneous_ability_list if a not in track_cooldown):
-                    ability_ready[tracked_ability] = True
-                for tracked_ability in (a for a in threshold_ability_list if a not in track_cooldown):
-                    ability_ready[tracked_ability] = True
-            elif adrenaline >= 50:
-                for tracked_ability in (a for a in threshold_ability_list if a not in track_cooldown):
-                    ability_ready[tracked_ability] = True
-            elif adrenaline < 50:
-                for tracked_ability in threshold_ability_list:
-                    ability_ready[tracked_ability] = False
-            if adrenaline < 60:
-                for tracked_ability in (a for a in igneous_ability_list if a not in track_cooldown):
-                    ability_ready[tracked_ability] = False
-            if adrenaline != 100:
-                for tracked_ability in ultimate_ability_list:
-                    ability_ready[tracked_ability] = False
-        # --- Determines if any abilities available/ whether auto attacks must be used --- #
-        if time_elapsed < cycle_duration:
-            ability_available = False
-            for _ in (a for a in permutation if ability_ready[a]):
-                ability_available = True
+        else:
+            # --- The next ability depends on a priority that has not been decided yet --- #
+            if complete is False and ready != 0:
+                finished = False
                 break
-            if ability_available is False:
+        # --- Determines whether thresholds or ultimates may be used. Abilities on cooldown are never ready --- #
+        if time_elapsed < end:
+            ready = (ready & ~gated) | (usable(adrenaline) & gated & ~cooling)
+        # --- Determines if any abilities available/ whether auto attacks must be used --- #
+        if time_elapsed < end:
+            if ready == 0:
+                if time_elapsed >= until:  # The auto attack or wait is left until after the pause, like the abilities
+                    finished = False
+                    break
                 if auto_available() is True:
-                    if (time_elapsed + attack_speed_cooldowns[attack_speed]) <= cycle_duration:
-                        time_elapsed += attack_speed_cooldowns[attack_speed]
+                    if (time_elapsed + attack_speed_ticks) <= end:
+                        time_elapsed += attack_speed_ticks
                     else:
-                        time_elapsed += (cycle_duration - time_elapsed)
                         break
-                    ability_path.append(f"AUTO D: {round(damage_dealt, 1)} T: {round(time_elapsed, 1)} A: {adrenaline}")
-                    if float(cycle_duration - time_elapsed) >= 0.6:
-                        damage_dealt += round(50 * current_buff, 1)
+                    if ability_path is not None:
+                        ability_path.append(path_entry("AUTO", damage_dealt, time_elapsed, adrenaline))
+                    if end - time_elapsed >= 1:
+                        damage_dealt += round(500 * current_buff)
                     else:
-                        damage_dealt += round(float(50 * round(float((cycle_duration - time_elapsed) / 0.6), 1)) *
-                                              current_buff, 1)
+                        damage_dealt += round(500 * round(end - time_elapsed, 1) * current_buff)
                     adrenaline += auto_adrenaline
-                    time_elapsed += 0.6
+                    time_elapsed += 1
                     if adrenaline > 100:
                         adrenaline = 100
+                    if counts is not None:
+                        counts["autos"] += 1
                     # Will also manage cooldowns
-                    current_buff = adjust_cooldowns(current_buff, adrenaline, (attack_speed_cooldowns[attack_speed] +
-                                                                               0.6))
+                    current_buff = adjust_cooldowns(current_buff, adrenaline, attack_speed_ticks + 1)
                 else:
-                    time_elapsed += 0.6
-                    current_buff = adjust_cooldowns(current_buff, adrenaline, 0.6)
-                time_elapsed = round(time_elapsed, 1)
-    return damage_dealt
+                    if counts is not None:
+                        counts["idle"] += 1
+                    time_elapsed += 1
+                    current_buff = adjust_cooldowns(current_buff, adrenaline, 1)
+    if finished is True and single is False:
+        for point, damage_before, made in visited:
+            memo.store(point, damage_dealt - damage_before, tuple(decisions[made:]))
+    rotation.damage_dealt = damage_dealt
+    rotation.current_buff = current_buff
+    rotation.time_elapsed = time_elapsed
+    rotation.shards = shards
+    rotation.adrenaline = adrenaline
+    rotation.ready = ready
+    rotation.cooling = cooling
+    rotation.buffed = buffed
+    return finished
+
+
+# Will return how much damage an ability bar will do over a given time, and keep its rotation in ability_path if record
+# is True
+def ability_rotation(permutation: Tuple[str, ...], record: bool = True,
+                     memo: Optional[TranspositionTable] = None, horizon: Optional[float] = None) -> float:
+    global ability_path
+    rotation = start_rotation(record)
+    advance_rotation(rotation, tuple(table.index[ability] for ability in permutation), memo=memo, horizon=horizon)
+    ability_path = rotation.ability_path
+    return rotation.damage_dealt / 10
+
+
+# Order of the settings in Configurations.txt
+config_settings: Tuple[str, ...] = ("Adrenaline", "Gain", "AttackSpeed", "Bleeds", "Stuns", "Abilities", "Style",
+                                    "Time", "units")
+
+
+# Turns a setting given on the command line or in a --configs file into the form it has in the configuration file.
+# Abilities and Style may leave out their brackets, or be given as lists
+def config_value(setting: str, value: object) -> str:
+    if isinstance(value, list):
+        value = ",".join(str(option) for option in value)
+    value = str(value).strip()
+    if setting == "Abilities" and not value.startswith("["):
+        value = f"[{value}]"
+    elif setting == "Style":
+        value = value.replace(" ", "")
+        if not value.startswith("("):
+            value = f"({value})"
+    return value
 
 
-def setup_config() -> None:
+# Reads the settings from the configuration file at path. overrides replaces settings of the file (by their position in
+# config_settings), and the file is not needed when every setting is overridden. When interactive is False, problems
+# with the settings are printed to standard error and the program exits with status 1 without waiting for the user
+def setup_config(path: str = "Configurations.txt", overrides: Optional[Dict[int, str]] = None,
+                 interactive: bool = True) -> None:
     global start_adrenaline, gain, attack_speed, activate_bleeds, debilitating, my_abilities, auto_adrenaline, cycle_duration
 
     def compare(lines) -> bool:
@@ -1127,15 +1408,18 @@ def setup_config() -> None:
         return error_log
 
     def repair_config_file() -> None:
-        repair: str = input("Configurations.txt has been modified, perform repair? (Y/N).\n>> ").upper()
+        if interactive is False:
+            print(f"{path} is missing or has been modified.", file=sys.stderr)
+            sys.exit(1)
+        repair: str = input(f"{path} has been modified, perform repair? (Y/N).\n>> ").upper()
         if (repair == "Y") or (repair == "YES"):
             import os
             correct_data: List[str] = ["# Rotation Parameters", "", "Adrenaline: ", "Gain: ", "AttackSpeed: ",
                                        "Bleeds: ", "Stuns: ", "Abilities: [,,,]", "Style: (,)", "Time: ", "", "# Mode",
                                        "", "units: seconds"]
-            if os.path.exists("Configurations.txt"):
-                os.remove("Configurations.txt")
-            with open("Configurations.txt", "w") as settings:
+            if os.path.exists(path):
+                os.remove(path)
+            with open(path, "w") as settings:
                 for line in correct_data:
                     settings.write(line + str("\n"))
             input("Repair successful! fill out settings in Configurations.txt before running calculator again. "
@@ -1145,21 +1429,30 @@ def setup_config() -> None:
     # --- Gets data for setup  --- #
     filedata: List[str] = []
     configurations: List[str] = []
-    try:
-        with open("Configurations.txt", "r") as settings:
-            for line in settings:
-                filedata.append(line.split(":")[0])
-                if ":" in line:
-                    configurations.append(line.split(":")[1].strip())
-        if compare(filedata) is False:
+    overrides = overrides or {}
+    if len(overrides) < len(config_settings) or os.path.exists(path):
+        try:
+            with open(path, "r") as settings:
+                for line in settings:
+                    filedata.append(line.split(":")[0])
+                    if ":" in line:
+                        configurations.append(line.split(":")[1].strip())
+            if compare(filedata) is False:
+                repair_config_file()
+        except Exception:
             repair_config_file()
-    except:
-        repair_config_file()
+    else:
+        configurations = [""] * len(config_settings)
+    for position, setting in overrides.items():
+        configurations[position] = setting
     error_log = validate(configurations)
     if len(error_log) > 0:
-        print("Errors were found!!!\n")
+        output = sys.stdout if interactive is True else sys.stderr  # Kept apart from the results of scripts
+        print("Errors were found!!!\n", file=output)
         for error in error_log:
-            print(error)
+            print(error, file=output)
+        if interactive is False:
+            sys.exit(1)
         input("\nCould not complete setup, please change fields accordingly and run the calculator again. "
               "Press enter to exit.\n>> ")
         sys.exit()
@@ -1170,6 +1463,8 @@ def setup_config() -> None:
     bound: str = configurations[4]
     if bound == "False":
         debilitating = []
+    else:
+        debilitating = base_tables["debilitating"].copy()
     my_abilities = []
     for ability in configurations[5][1:-1].split(","):
         my_abilities.append(ability.strip().upper())
@@ -1188,25 +1483,12 @@ def setup_config() -> None:
         cycle_duration *= 0.6
 
 
-def main() -> None:
-    global basic_ability_list, threshold_ability_list, ultimate_ability_list, igneous_ability_list, track_cooldown, track_buff, ability_path, ability_ready
-
-    # Converts raw seconds into Years, Weeks, etc...
-    def get_time(seconds: int) -> str:
-        years: int = int(seconds / 31449600)
-        seconds -= years * 31449600
-        weeks: int = int(seconds / 604800)
-        seconds -= weeks * 604800
-        days: int = int(seconds / 86400)
-        seconds -= days * 86400
-        hours: int = int(seconds / 3600)
-        seconds -= hours * 3600
-        minutes: int = int(seconds / 60)
-        seconds -= minutes * 60
-        eta: str = f"{years} years, {weeks} weeks, {days} days, {hours} hours, {minutes} minutes and {seconds} seconds."
-        return eta
-
-    # Removes abilities from lists and dictionaries not being used to save runtime and memory
+# Removes abilities from lists and dictionaries not being used to save runtime and memory. The tables are copied from
+# base_tables first (debilitating is left to the Stuns setting), so the ones of an earlier configuration are not changed
+def prepare_tables() -> None:
+    global copy_of_ready
+    globals().update({name: data.copy() for name, data in base_tables.items() if name != "debilitating"})
+
     def remove() -> Dict[str, bool]:
         for ability in abilities:
             if not (ability in my_abilities):
@@ -1237,30 +1519,2670 @@ def main() -> None:
                     aoe.remove(ability)
         return dict(ability_ready)
 
-    setup_config()
-    # --- Dictionaries, lists and other data types laid out here --- #
-    print("Starting process ...")
     copy_of_ready = remove()
-    basic_ability_list = [a for a in ability_type if ability_type[a] == "B"]
-    threshold_ability_list = [a for a in ability_type if ability_type[a] == "T"]
-    ultimate_ability_list = [a for a in ability_type if ability_type[a] == "U"]
-    igneous_ability_list = [a for a in ability_type if ability_type[a] == "I"]
-    track_cooldown = {}
-    track_buff = {}
-    ability_path = []
-    best_rotation: List[str] = []
-    worst_rotation: List[str] = []
-    # --- Calculations for estimation of time remaining --- #
-    permutation_count: int = math.factorial(len(my_abilities))
-    time_remaining_calculation: int = permutation_count / 10000
+
+
+# Multiplies the damage of area of effect abilities by the average amount of targets hit
+def scale_aoe(targets: float) -> None:
+    global aoe_average_targets_hit
+    aoe_average_targets_hit = targets
+    if aoe_average_targets_hit > 1:
+        for ability in my_abilities:
+            if ability in aoe:
+                ability_damage[ability] = ability_damage[ability] * aoe_average_targets_hit
+
+
+# Converts the tables used by the simulator to ticks and tenths of a percent. Must be called after scale_aoe()
+def convert_tables() -> None:
+    global ability_ticks, cooldown_ticks, buff_ticks, bleed_ticks, damage_tenths, attack_speed_ticks, cycle_ticks
+    ability_ticks = {a: round(ability_time[a] / tick) for a in ability_time}
+    cooldown_ticks = {a: round(ability_cooldown[a] / tick) for a in ability_cooldown}
+    buff_ticks = {a: round(buff_time[a] / tick) for a in buff_time}
+    bleed_ticks = {a: round(bleeds[a] / tick) for a in bleeds}
+    damage_tenths = {a: ability_damage[a] * 10 for a in ability_damage}
+    attack_speed_ticks = round(attack_speed_cooldowns[attack_speed] / tick)
+    cycle_ticks = cycle_duration / tick
+    if abs(cycle_ticks - round(cycle_ticks)) < 1e-6:  # Whole ticks are kept exact
+        cycle_ticks = round(cycle_ticks)
+
+
+# Builds the AbilityTable used by the simulator. Must be called after convert_tables()
+def compile_table() -> None:
+    global table
+    type_adrenaline: Dict[str, int] = {"B": 9, "T": -15, "I": -60, "U": 0}
+
+    def mask(selected) -> int:
+        return sum(1 << index for index, ability in enumerate(my_abilities) if ability in selected)
+
+    table = AbilityTable()
+    table.names = list(my_abilities)
+    table.index = {ability: index for index, ability in enumerate(my_abilities)}
+    table.damage = [damage_tenths[a] for a in my_abilities]
+    table.ticks = [ability_ticks[a] for a in my_abilities]
+    table.cooldown = [cooldown_ticks[a] for a in my_abilities]
+    table.adrenaline = [type_adrenaline[ability_type[a]] for a in my_abilities]
+    # Ticks over which channelled abilities and bleeds deal their damage when cut short by the end of the rotation,
+    # 0 for those that always deal all of it
+    table.channel = [ability_ticks[a] if (a not in special_abilities) and (ability_ticks[a] > 3) else 0
+                     for a in my_abilities]
+    table.bleed = [bleed_ticks[a] if (a in bleed_ticks) and (a != "SHADOW TENDRILS") else 0 for a in my_abilities]
+    table.walking_bleed = [walking_bleeds.get(a, 1) for a in my_abilities]
+    table.buff = [buff_ticks[a] if (a in buff_ticks) and (a not in punishing) else 0 for a in my_abilities]
+    table.effect = [buff_effect.get(a) for a in my_abilities]
+    table.initially_ready = mask([a for a in copy_of_ready if copy_of_ready[a] is True])
+    table.basic = mask([a for a in ability_type if ability_type[a] == "B"])
+    table.threshold = mask([a for a in ability_type if ability_type[a] == "T"])
+    table.igneous = mask([a for a in ability_type if ability_type[a] == "I"])
+    table.ultimate = mask([a for a in ability_type if ability_type[a] == "U"])
+    table.bleeds = mask(bleed_ticks)
+    table.special_bleeds = mask(special_bleeds)
+    table.walking_bleeds = mask(walking_bleeds) if activate_bleeds is True else 0
+    table.crit_boost = mask(crit_boost)
+    table.binds = mask(binds)
+    table.debilitating = mask(debilitating)
+    table.punishing = mask(punishing)
+    table.boosting = mask([a for a in buff_effect if (a in buff_ticks) and (a not in punishing)])
+    table.storm_shards = table.index.get("STORM SHARDS", -1)
+    table.shatter = table.index.get("SHATTER", -1)
+    table.smoke_tendrils = table.index.get("SMOKE TENDRILS", -1)
+    # ordered[i] holds the abilities that dominance puts ahead of ability i
+    table.ordered = [mask([first for first, second in dominance if second == ability]) for ability in my_abilities]
+
+
+# Collects everything a worker process needs to rebuild the same tables as this process
+def current_settings() -> Dict[str, object]:
+    settings: Dict[str, object] = {"start_adrenaline": start_adrenaline, "gain": gain, "attack_speed": attack_speed,
+                                   "activate_bleeds": activate_bleeds, "debilitating": list(debilitating),
+                                   "my_abilities": list(my_abilities), "auto_adrenaline": auto_adrenaline,
+                                   "cycle_duration": cycle_duration, "aoe_average_targets_hit": aoe_average_targets_hit}
+    if len(dominance) > 0:  # Left out otherwise, so searches without --dominance keep their checkpoints and cache
+        settings["dominance"] = [list(pair) for pair in dominance]
+    return settings
+
+
+# Globals that make up the tables of a configuration, as set up by use_settings()
+config_globals: Tuple[str, ...] = ("start_adrenaline", "gain", "attack_speed", "activate_bleeds", "my_abilities",
+                                   "auto_adrenaline", "cycle_duration", "aoe_average_targets_hit", "copy_of_ready",
+                                   "ability_ticks", "cooldown_ticks", "buff_ticks", "bleed_ticks", "damage_tenths",
+                                   "attack_speed_ticks", "cycle_ticks", "table", "dominance") + tuple(base_tables)
+
+# Tables of every configuration set up in this process, by config_hash()
+prepared_configs: Dict[str, Dict[str, object]] = {}
+
+
+# Sets up the tables for settings (as made by current_settings()). Each configuration is built from base_tables the
+# first time it is used and never changed afterwards, so switching back to it only rebinds the globals
+def use_settings(settings: Dict[str, object]) -> None:
+    global start_adrenaline, gain, attack_speed, activate_bleeds, debilitating, my_abilities, auto_adrenaline, cycle_duration, dominance
+    key: str = config_hash(settings)
+    if key not in prepared_configs:
+        start_adrenaline = settings["start_adrenaline"]
+        gain = settings["gain"]
+        attack_speed = settings["attack_speed"]
+        activate_bleeds = settings["activate_bleeds"]
+        debilitating = list(settings["debilitating"])
+        my_abilities = list(settings["my_abilities"])
+        auto_adrenaline = settings["auto_adrenaline"]
+        cycle_duration = settings["cycle_duration"]
+        dominance = [tuple(pair) for pair in settings.get("dominance", [])]
+        prepare_tables()
+        scale_aoe(settings["aoe_average_targets_hit"])
+        convert_tables()
+        compile_table()
+        prepared_configs[key] = {name: globals()[name] for name in config_globals}
+    globals().update(prepared_configs[key])
+
+
+# Worker processes ignore Control C (the main process handles it), and spawned workers rebuild the tables from the
+# settings of the main process. Forked workers (settings is None) already share them. With instrument, workers keep
+# counters of their own for each shard
+def init_worker(settings: Optional[Dict[str, object]], instrument: bool = False) -> None:
+    global counters
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if settings is not None:
+        use_settings(settings)
+    counters = dict.fromkeys(counter_names, 0) if instrument is True else None
+
+
+# Runs a search in a worker process, with the counts of the simulator (when they are kept) for that search alone in
+# results["counters"]
+def counted_search(search: Callable[..., None], results: Dict[str, object], *args, **kwargs) -> None:
+    if counters is not None:
+        counters.update(dict.fromkeys(counter_names, 0))
+    search(*args, **kwargs)
+    if counters is not None:
+        results["counters"] = dict(counters)
+
+
+# Keeps the size best bars offered so far in a min-heap, so memory does not grow with the number of bars. threshold is
+# the damage a bar has to beat to get in, and bars dealing the same damage are ranked in permutation order. With a sign
+# of -1 the worst bars are kept instead, and threshold is the damage a bar has to stay under
+class Leaderboard:
+    __slots__ = ("size", "sign", "heap", "threshold")
+
+    def __init__(self, size: int, sign: int = 1) -> None:
+        self.size = size
+        self.sign = sign
+        self.heap: List[Tuple[float, int, List[str], int]] = []
+        self.threshold: float = 0 if sign == 1 else float("inf")
+
+    # Adds a bar (whose rotation count bars share) if it ranks among the best size bars. Returns whether it was kept
+    def offer(self, damage_dealt: float, bar: List[str], count: int = 1) -> bool:
+        entry: Tuple[float, int, List[str], int] = (damage_dealt * self.sign, -bar_rank(bar), list(bar), count)
+        if len(self.heap) < self.size:
+            heapq.heappush(self.heap, entry)
+        elif entry[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, entry)
+        else:
+            return False
+        if len(self.heap) == self.size:
+            self.threshold = self.heap[0][0] * self.sign
+        return True
+
+    # Offers bars that share a rotation, in permutation order, until one is not kept since the rest rank lower still
+    def offer_run(self, damage_dealt: float, bars: List[List[str]], count: int) -> None:
+        for bar in bars[:self.size]:
+            if self.offer(damage_dealt, bar, count) is False:
+                break
+
+    # Offers every bar of other, apart from bars kept already (--heuristic searches can find the same bars)
+    def merge(self, other: "Leaderboard") -> None:
+        for damage_dealt, bar, count in other.entries():
+            if all(entry[2] != bar for entry in self.heap):
+                self.offer(damage_dealt, bar, count)
+
+    # Returns (damage, bar, count) for every bar kept, the best first
+    def entries(self) -> List[Tuple[float, List[str], int]]:
+        return [(key * self.sign, bar, count) for key, _, bar, count in sorted(self.heap, reverse=True)]
+
+
+def new_results(top: int = 1, bottom: int = 1) -> Dict[str, object]:
+    return {"highest": 0, "best_bar": None, "best_rotation": [], "lowest": float("inf"), "worst_bar": None,
+            "worst_rotation": [], "best_count": 0, "worst_count": 0, "bars": 0, "simulated": 0,
+            "pruned": 0, "top": Leaderboard(top), "bottom": Leaderboard(bottom, -1), "memo_lookups": 0,
+            "memo_hits": 0, "memo_evictions": 0}
+
+
+# Bars between the calls of report by the searches, which decides itself whether it is time to show anything. Checking
+# the clock every bar would slow the searches down
+report_every: int = 1000
+
+
+# The transposition table of this process, see transposition_table()
+transpositions: Optional[TranspositionTable] = None
+
+
+# Returns the transposition table of this process for memory bytes, which is kept from one shard to the next and made
+# anew when the settings change
+def transposition_table(memory: int) -> TranspositionTable:
+    global transpositions
+    config: str = config_hash()
+    if transpositions is None or transpositions.config != config or transpositions.memory != memory:
+        transpositions = TranspositionTable(memory, config)
+    return transpositions
+
+
+# Adds what memo did since it was counted in counted (its lookups, hits and evictions) to results
+def count_transpositions(results: Dict[str, object], memo: Optional[TranspositionTable],
+                         counted: List[int]) -> None:
+    if memo is not None:
+        now: List[int] = [memo.lookups, memo.hits, memo.evictions]
+        for key, done, before in zip(("memo_lookups", "memo_hits", "memo_evictions"), now, counted):
+            results[key] += done - before
+        counted[:] = now
+
+
+# Checks that priority (table indices, highest first) puts every ability after the ones dominance puts ahead of it
+def keeps_order(priority: Tuple[int, ...]) -> bool:
+    placed: int = 0
+    for index in priority:
+        if table.ordered[index] & ~placed != 0:
+            return False
+        placed |= 1 << index
+    return True
+
+
+# Yields the orders of remaining (as table indices) that can follow prefix without breaking dominance, in the same order
+# as itertools.permutations(remaining) would. Orders that break it come in runs sharing their first abilities, and the
+# number of bars in each run is yielded in its place
+def ordered_permutations(prefix: Tuple[str, ...], remaining: List[str]) -> Iterator[object]:
+    ordered: List[int] = table.ordered
+
+    def orders(rest: Tuple[int, ...]) -> Iterator[object]:
+        unplaced: int = sum(1 << index for index in rest)
+        if all(ordered[index] & unplaced == 0 for index in rest):
+            yield from itertools.permutations(rest)
+            return
+        for place, index in enumerate(rest):
+            after: Tuple[int, ...] = rest[:place] + rest[place + 1:]
+            if ordered[index] & unplaced != 0:
+                yield math.factorial(len(after))
+                continue
+            for order in orders(after):
+                yield (index,) + order if type(order) is tuple else order
+
+    if keeps_order(tuple(table.index[ability] for ability in prefix)) is False:
+        yield math.factorial(len(remaining))
+        return
+    yield from orders(tuple(table.index[ability] for ability in remaining))
+
+
+# Tests every ability bar starting with prefix, in the same order as itertools.permutations(my_abilities) would, and
+# stores the best and worst bars in results. When running in the main process, report is called with the results so
+# far every report_every bars. With memory (in bytes), rotations are shared through a transposition table of that size.
+# Bars that break dominance are skipped, and counted as covered. With until (--save-horizon), the state of every bar at
+# the first decision from that tick on is added to results["states"], and its index there to results["runs"] (as
+# [index, bars] for runs of bars in the same state). With start (such lists for the bars of prefix, --extend), each bar
+# carries on from its saved state instead of from the start. With horizons (shorter times in ticks, in increasing
+# order), results["horizons"] gets results of the same form for each of them, from the same simulation of each bar: the
+# rotation is copied where the end of the shorter time starts to matter, and only the copy is ended there
+def search_bars(prefix: Tuple[str, ...], results: Dict[str, object], report=None, memory: int = 0,
+                until: Optional[int] = None, start: Optional[Tuple[List[tuple], List[List[int]]]] = None,
+                horizons: Optional[List[float]] = None) -> None:
+    remaining: List[str] = [a for a in my_abilities if a not in prefix]
+    if len(dominance) > 0:
+        names: List[str] = table.names
+        orders: Iterator[object] = (tuple(names[index] for index in order) if type(order) is tuple else order
+                                    for order in ordered_permutations(prefix, remaining))
+    else:
+        orders = itertools.permutations(remaining)
+    current_highest: float = results["highest"]
+    current_lowest: float = results["lowest"]
+    best_bar: Optional[List[str]] = results["best_bar"]
+    worst_bar: Optional[List[str]] = results["worst_bar"]
+    top: Leaderboard = results["top"]
+    bottom: Leaderboard = results["bottom"]
+    runthrough: int = results["bars"]
+    simulated: int = results["simulated"] - runthrough  # Every bar is simulated on its own, apart from skipped ones
+    pruned: int = results["pruned"]
+    memo: Optional[TranspositionTable] = transposition_table(memory) if memory > 0 else None
+    counted: List[int] = [memo.lookups, memo.hits, memo.evictions] if memo is not None else []
+    states: List[tuple] = results.setdefault("states", []) if until is not None else []
+    runs: List[List[int]] = results.setdefault("runs", []) if until is not None else []
+    saved: Dict[tuple, int] = {}
+    resumed: Optional[Iterator[tuple]] = None
+    shorter: List[Dict[str, object]] = []
+    margin: int = 0
+    if horizons is not None:
+        shorter = results.setdefault("horizons", [new_results(top.size, bottom.size) for _ in horizons])
+        margin = horizon_margin()
+    if start is not None:
+        resumed = itertools.chain.from_iterable(itertools.repeat(start[0][index], bars) for index, bars in start[1])
+
+    def save() -> None:
+        results.update(highest=current_highest, best_bar=best_bar, lowest=current_lowest, worst_bar=worst_bar,
+                       best_count=int(best_bar is not None), worst_count=int(worst_bar is not None), bars=runthrough,
+                       simulated=simulated + runthrough, pruned=pruned)
+        count_transpositions(results, memo, counted)
+
+    # Keeps track of the best and worst bars over a shorter time
+    def offer(kept: Dict[str, object], damage_dealt: float, permutation: Tuple[str, ...]) -> None:
+        if damage_dealt > kept["highest"]:
+            kept.update(highest=damage_dealt, best_bar=list(permutation), best_count=1)
+        if damage_dealt < kept["lowest"]:
+            kept.update(lowest=damage_dealt, worst_bar=list(permutation), worst_count=1)
+        if damage_dealt > kept["top"].threshold:
+            kept["top"].offer(damage_dealt, permutation)
+        if damage_dealt < kept["bottom"].threshold:
+            kept["bottom"].offer(damage_dealt, permutation)
+        kept["bars"] += 1
+        kept["simulated"] += 1
+
+    # Simulates a bar from its saved state (or from the start), ending copies of it at the shorter horizons and saving
+    # its state at until on the way when asked to
+    def horizon_rotation(permutation: Tuple[str, ...]) -> float:
+        rotation: Rotation = restore_rotation(next(resumed)) if resumed is not None else start_rotation(False)
+        priority: Tuple[int, ...] = tuple(table.index[ability] for ability in permutation)
+        for horizon, kept in zip(horizons or (), shorter):
+            advance_rotation(rotation, priority, until=horizon - margin)
+            branch: Rotation = rotation.copy()
+            advance_rotation(branch, priority, horizon=horizon)
+            offer(kept, branch.damage_dealt / 10, permutation)
+        if until is not None:
+            advance_rotation(rotation, priority, until=until)
+            state: tuple = rotation_state(rotation)
+            index: Optional[int] = saved.get(state)
+            if index is None:
+                index = saved[state] = len(states)
+                states.append(state)
+            if len(runs) > 0 and runs[-1][0] == index:
+                runs[-1][1] += 1
+            else:
+                runs.append([index, 1])
+        advance_rotation(rotation, priority)
+        return rotation.damage_dealt / 10
+
+    try:
+        for remainder in orders:
+            if type(remainder) is int:
+                pruned += 1
+                simulated -= remainder
+                previous: int = runthrough
+                runthrough += remainder
+                if report is not None and runthrough // report_every > previous // report_every:
+                    save()
+                    report(results)
+                continue
+            permutation = prefix + remainder
+            if until is None and start is None and horizons is None:
+                damage_dealt: float = ability_rotation(permutation, False, memo)
+            else:
+                damage_dealt = horizon_rotation(permutation)
+            # --- Check if any better/worse bars have been found --- #
+            if damage_dealt > current_highest:
+                current_highest = damage_dealt
+                best_bar = list(permutation)
+                if report is not None:
+                    print(f"New best bar with damage {current_highest}: {best_bar}")
+            if damage_dealt < current_lowest:
+                current_lowest = damage_dealt
+                worst_bar = list(permutation)
+            if damage_dealt > top.threshold:
+                top.offer(damage_dealt, permutation)
+            if damage_dealt < bottom.threshold:
+                bottom.offer(damage_dealt, permutation)
+            runthrough += 1
+            if report is not None and runthrough % report_every == 0:
+                save()
+                report(results)
+    finally:
+        save()
+
+
+# Returns a function giving the most damage a paused rotation could still end up with. No ability or auto attack can
+# deal more than its damage with every damage boost active (rounded up), and no ability can be used more often than its
+# cooldown allows. The time left is filled with the abilities dealing the most damage per second, up to those limits,
+# and auto attacks after that, plus one more ability (or auto attack) started just before the end, out of the abilities
+# that are off cooldown by then. Storm shards are counted as the damage shatter could later deal with them
+def upper_bound_function() -> Callable[[Rotation], float]:
+    boost: float = 1
+    for ability in crit_boost:
+        if ability in my_abilities:
+            boost *= max(buff_effect.get(ability, 1), 1)
+    boost *= 1 + 1e-9  # Room for floating point drift of the buff multipliers
+    most_damage: Dict[str, float] = {}
+    for ability in my_abilities:
+        bleed_multiplier: float = 1
+        if (activate_bleeds is True) and (ability in walking_bleeds):
+            bleed_multiplier = 2 * walking_bleeds[ability]
+        if ability in bleeds:
+            if ability == "SMOKE TENDRILS":
+                damage: float = ability_damage[ability] * (boost + bleed_multiplier)
+            elif ability in special_bleeds:
+                damage = ((112.8 * boost) + 313.33) * bleed_multiplier
+            else:
+                damage = ability_damage[ability] * bleed_multiplier
+        elif ability in punishing:
+            damage = ability_damage[ability] * max(buff_effect.get(ability, 1), 1) * boost
+        else:
+            damage = ability_damage[ability] * boost
+        if ability == "STORM SHARDS":
+            damage += 85
+        most_damage[ability] = damage + 0.05
+    auto_damage: float = 50 * boost + 0.05
+    auto_rate: float = auto_damage / (attack_speed_ticks + 1)
+    last: List[Tuple[float, int]] = sorted(((most_damage[a], table.index[a]) for a in my_abilities
+                                            if most_damage[a] > auto_damage), reverse=True)
+    stored: float = 85 if "SHATTER" in my_abilities else 0
+    # Only abilities that deal more damage per tick than auto attacks are worth using in the bound
+    rates: List[Tuple[float, int]] = sorted(((most_damage[a] / ability_ticks[a], table.index[a]) for a in my_abilities
+                                             if most_damage[a] / ability_ticks[a] > auto_rate), reverse=True)
+
+    # Stops adding up once the bound reaches cutoff, since it only needs to be known whether it is below it
+    def upper_bound(rotation: Rotation, cutoff: float = math.inf) -> float:
+        time_left: float = cycle_ticks - rotation.time_elapsed
+        damage: float = rotation.damage_dealt / 10 + rotation.shards * stored
+        if time_left <= 0:
+            return damage
+        single: float = auto_damage
+        for most, ability in last:
+            if not (rotation.cooling >> ability) & 1 or rotation.cooldown_left[ability] < time_left:
+                single = most
+                break
+        damage += single
+        free: float = time_left
+        for rate, ability in rates:
+            cooldown_left: int = 0
+            if (rotation.cooling >> ability) & 1:
+                cooldown_left = rotation.cooldown_left[ability]
+            if cooldown_left < time_left:
+                uses: int = int((time_left - cooldown_left) // table.cooldown[ability]) + 1
+                busy: float = min(uses * table.ticks[ability], free)
+                damage += busy * rate
+                free -= busy
+                if free <= 0 or damage >= cutoff:
+                    break
+        return damage + max(free, 0) * auto_rate
+
+    return upper_bound
+
+
+# Searches the same ability bars as search_bars, but depth first over the priorities of a bar. Bars that share their
+# first priorities share the start of their rotation, so it is simulated once and copied at each point where the next
+# ability depends on a priority that has not been decided yet. When a rotation finishes before the remaining priorities
+# matter, every bar below it deals the same damage and is represented by the first of them in permutation order, so
+# the best and worst bars match search_bars exactly. With bound, branches that can neither beat the best bar (going by
+# upper_bound_function()) nor the worst bar (damage only goes up) are skipped. With memory (in bytes), rotations that
+# reach the same point from different branches are shared through a transposition table of that size. Branches that
+# break dominance are skipped as well. Each finished rotation counts as one simulation. The search of a prefix follows
+# it down from the first priority, and only counts the rotations and skipped branches whose first bar starts with
+# prefix, so that the shards of a search count each of them once between them, as a single search does
+def search_tree(prefix: Tuple[str, ...], results: Dict[str, object], report=None, bound: bool = False,
+                memory: int = 0) -> None:
+    current_highest: float = results["highest"]
+    current_lowest: float = results["lowest"]
+    best_bar: Optional[List[str]] = results["best_bar"]
+    worst_bar: Optional[List[str]] = results["worst_bar"]
+    best_count: int = results["best_count"]
+    worst_count: int = results["worst_count"]
+    runthrough: int = results["bars"]
+    simulated: int = results["simulated"]
+    pruned: int = results["pruned"]
+    top: Leaderboard = results["top"]
+    bottom: Leaderboard = results["bottom"]
+    upper_bound: Callable[[Rotation], float] = upper_bound_function()
+    memo: Optional[TranspositionTable] = transposition_table(memory) if memory > 0 else None
+    counted: List[int] = [memo.lookups, memo.hits, memo.evictions] if memo is not None else []
+    start: Tuple[int, ...] = tuple(table.index[ability] for ability in prefix)
+
+    def save() -> None:
+        results.update(highest=current_highest, best_bar=best_bar, lowest=current_lowest, worst_bar=worst_bar,
+                       best_count=best_count, worst_count=worst_count, bars=runthrough, simulated=simulated,
+                       pruned=pruned)
+        count_transpositions(results, memo, counted)
+
+    # Whether the first bar below priority in permutation order (apart from those breaking dominance) starts with prefix
+    def owns(priority: Tuple[int, ...], remaining: List[int]) -> bool:
+        placed: int = sum(1 << ability for ability in priority)
+        first: List[int] = list(priority)
+        while len(first) < len(start):
+            ability: int = next(a for a in remaining if not (placed >> a) & 1 and table.ordered[a] & ~placed == 0)
+            placed |= 1 << ability
+            first.append(ability)
+        return tuple(first[:len(start)]) == start
+
+    # shared is True while rotation still belongs to an ancestor, paused at the same decision. seek_best and seek_worst
+    # are False once the rotation can no longer beat the best or worst bar
+    def descend(rotation: Rotation, priority: Tuple[int, ...], remaining: List[int], shared: bool, seek_best: bool,
+                seek_worst: bool) -> None:
+        nonlocal current_highest, current_lowest, best_bar, worst_bar, best_count, worst_count, runthrough, simulated, pruned
+        # --- Above the end of prefix, only the bars starting with it are searched and counted --- #
+        fixed: Tuple[int, ...] = start[len(priority):]
+        rest: List[int] = remaining if len(fixed) == 0 else [ability for ability in remaining if ability not in fixed]
+        owned: bool = len(fixed) == 0 or owns(priority, remaining)
+        if shared is False and advance_rotation(rotation, priority, len(remaining) == 0, memo=memo) is True:
+            if owned is True:
+                simulated += 1  # Each finished rotation counts as one simulation, however often it was copied
+            # --- The bars below the rotation in permutation order, apart from those breaking dominance --- #
+            orders: Iterator[Tuple[int, ...]] = filter(keeps_order, (priority + fixed + order for order in
+                                                                     itertools.permutations(rest)))
+            first: Optional[Tuple[int, ...]] = next(orders, None)
+            if first is None:  # Every bar of prefix breaks dominance, the rotation is left to a prefix of its first bar
+                first = priority + fixed + tuple(rest)
+                seek_best = seek_worst = False
+            permutation: List[str] = [my_abilities[index] for index in first]
+            bars: int = math.factorial(len(rest))
+            damage_dealt: float = rotation.damage_dealt / 10
+            if seek_best is True and damage_dealt > current_highest:
+                current_highest = damage_dealt
+                best_bar = permutation
+                best_count = bars
+                if report is not None:
+                    print(f"New best bar with damage {current_highest}: {best_bar}")
+            if seek_worst is True and damage_dealt < current_lowest:
+                current_lowest = damage_dealt
+                worst_bar = permutation
+                worst_count = bars
+            listing: bool = ((seek_best is True and damage_dealt > top.threshold) or
+                             (seek_worst is True and damage_dealt < bottom.threshold))
+            listed: List[List[str]] = [permutation]
+            if listing is True and bars > 1:
+                listed += [[my_abilities[index] for index in order]
+                           for order in itertools.islice(orders, max(top.size, bottom.size) - 1)]
+            if seek_best is True and damage_dealt > top.threshold:
+                top.offer_run(damage_dealt, listed, bars)
+            if seek_worst is True and damage_dealt < bottom.threshold:
+                bottom.offer_run(damage_dealt, listed, bars)
+            previous: int = runthrough
+            runthrough += bars
+            if report is not None and runthrough // report_every > previous // report_every:
+                save()
+                report(results)
+            return
+        if bound is True and shared is False:  # A shared rotation was checked at the decision it belongs to
+            seek_best = seek_best and upper_bound(rotation, top.threshold) >= top.threshold
+            seek_worst = seek_worst and rotation.damage_dealt / 10 <= bottom.threshold
+            if seek_best is False and seek_worst is False:
+                if owned is True:
+                    pruned += 1
+                previous = runthrough
+                runthrough += math.factorial(len(rest))
+                if report is not None and runthrough // report_every > previous // report_every:
+                    save()
+                    report(results)
+                return
+        # --- Every remaining ability is tried as the next priority. Abilities that are not ready leave the rotation
+        # paused, so they share it; the others get a copy, apart from the last one which takes over the rotation.
+        # Abilities that dominance puts after one of the remaining abilities are skipped --- #
+        unplaced: int = sum(1 << ability for ability in remaining) if len(dominance) > 0 else 0
+        for index, ability in enumerate(remaining):
+            if len(fixed) > 0 and ability != fixed[0]:
+                continue  # The bars of other prefixes
+            last: bool = len(fixed) > 0 or index == len(remaining) - 1
+            if table.ordered[ability] & unplaced != 0:
+                if len(fixed) == 0 or owns(priority + (ability,), remaining[:index] + remaining[index + 1:]) is True:
+                    pruned += 1
+                previous = runthrough
+                runthrough += math.factorial(len(rest) if len(fixed) > 0 else len(remaining) - 1)
+                if report is not None and runthrough // report_every > previous // report_every:
+                    save()
+                    report(results)
+            elif (rotation.ready >> ability) & 1:
+                branch: Rotation = rotation if (shared is False and last is True) else rotation.copy()
+                descend(branch, priority + (ability,), remaining[:index] + remaining[index + 1:], False, seek_best,
+                        seek_worst)
+            else:
+                descend(rotation, priority + (ability,), remaining[:index] + remaining[index + 1:], True, seek_best,
+                        seek_worst)
+
+    try:
+        descend(start_rotation(False), (), list(range(len(my_abilities))), False, True, True)
+    finally:
+        save()
+
+
+# Returns the first bar in permutation order that respects before, where before[i] holds the abilities (as bits of
+# their position in my_abilities) that must have a higher priority than ability i
+def first_bar(before: List[int]) -> List[str]:
+    placed: int = 0
+    bar: List[str] = []
+    for _ in range(len(before)):
+        for position in range(len(before)):
+            if not (placed >> position) & 1 and before[position] & ~placed == 0:
+                placed |= 1 << position
+                bar.append(my_abilities[position])
+                break
+    return bar
+
+
+# Yields the bars that respect before in permutation order, starting with first_bar(before)
+def respecting_bars(before: List[int]) -> Iterator[List[str]]:
+    def extend(placed: int, bar: List[str]) -> Iterator[List[str]]:
+        if len(bar) == len(before):
+            yield bar
+        for position in range(len(before)):
+            if not (placed >> position) & 1 and before[position] & ~placed == 0:
+                yield from extend(placed | 1 << position, bar + [my_abilities[position]])
+
+    return extend(0, [])
+
+
+# Counts the bars that respect before. Abilities that are not ordered against any other can go anywhere, so only the
+# ordered ones are counted one by one
+def bar_count(before: List[int]) -> int:
+    ordered: int = 0
+    for position, earlier in enumerate(before):
+        if earlier != 0:
+            ordered |= earlier | (1 << position)
+    steps: List[Tuple[int, int]] = [(1 << p, before[p]) for p in range(len(before)) if (ordered >> p) & 1]
+    # --- The ways to place each set of ordered abilities first, one more ability at a time --- #
+    counted: Dict[int, int] = {0: 1}
+    for _ in steps:
+        extended: Dict[int, int] = {}
+        for placed, ways in counted.items():
+            for bit, earlier in steps:
+                if not placed & bit and earlier & ~placed == 0:
+                    extended[placed | bit] = extended.get(placed | bit, 0) + ways
+        counted = extended
+    return counted[ordered] * math.factorial(len(before)) // math.factorial(len(steps))
+
+
+# Returns a copy of before where first has a higher priority than every other ability in others
+def constrain(before: List[int], first: int, others: List[int]) -> List[int]:
+    before = list(before)
+    ahead: int = before[first] | (1 << first)
+    for other in others:
+        if other != first:
+            for position in range(len(before)):
+                if position == other or (before[position] >> other) & 1:
+                    before[position] |= ahead
+    return before
+
+
+# Searches distinct rotations instead of bars. Only the relative priority of abilities that are ready at the same time
+# changes a rotation, so the search only branches when two or more abilities are ready and none of them is already
+# known to have priority over the others. The simulator runs on by itself up to the next such point. Each finished
+# rotation stands for every bar that respects the priorities decided along the way, and is represented by the first
+# of those bars in permutation order. It counts as one simulation. bound skips rotations the same way as search_tree,
+# and dominance is added to the priorities decided from the start
+def search_traces(prefix: Tuple[str, ...], results: Dict[str, object], report=None, bound: bool = False) -> None:
+    current_highest: float = results["highest"]
+    current_lowest: float = results["lowest"]
+    best_bar: Optional[List[str]] = results["best_bar"]
+    worst_bar: Optional[List[str]] = results["worst_bar"]
+    best_count: int = results["best_count"]
+    worst_count: int = results["worst_count"]
+    runthrough: int = results["bars"]
+    simulated: int = results["simulated"]
+    pruned: int = results["pruned"]
+    top: Leaderboard = results["top"]
+    bottom: Leaderboard = results["bottom"]
+    upper_bound: Callable[[Rotation], float] = upper_bound_function()
+
+    def save() -> None:
+        results.update(highest=current_highest, best_bar=best_bar, lowest=current_lowest, worst_bar=worst_bar,
+                       best_count=best_count, worst_count=worst_count, bars=runthrough, simulated=simulated,
+                       pruned=pruned)
+    positions: Dict[str, int] = {ability: position for position, ability in enumerate(my_abilities)}
+
+    # Bars are compared in permutation order when their damage ties, like search_bars would
+    def rank(bar: Optional[List[str]]) -> List[int]:
+        return [positions[ability] for ability in bar] if bar is not None else []
+
+    def count(bars: int) -> None:
+        nonlocal runthrough
+        previous: int = runthrough
+        runthrough += bars
+        if report is not None and runthrough // report_every > previous // report_every:
+            save()
+            report(results)
+
+    # bars is the number of bars respecting before, all of which share rotation
+    def finish(rotation: Rotation, before: List[int], bars: int, seek_best: bool, seek_worst: bool) -> None:
+        nonlocal current_highest, current_lowest, best_bar, worst_bar, best_count, worst_count, simulated
+        simulated += 1
+        damage_dealt: float = rotation.damage_dealt / 10
+        # --- The best and worst bars are never below or above the leaderboards, so only the rotations that make it
+        # onto one need the bar standing for them --- #
+        seek_best = seek_best and damage_dealt >= top.threshold
+        seek_worst = seek_worst and damage_dealt <= bottom.threshold
+        if seek_best is False and seek_worst is False:
+            count(bars)
+            return
+        permutation: List[str] = first_bar(before)
+        if seek_best is False:
+            pass
+        elif damage_dealt > current_highest or (damage_dealt == current_highest and
+                                                rank(permutation) < rank(best_bar)):
+            if damage_dealt > current_highest and report is not None:
+                print(f"New best bar with damage {damage_dealt}: {permutation}")
+            current_highest = damage_dealt
+            best_bar = permutation
+            best_count = bars
+        if seek_worst is False:
+            pass
+        elif damage_dealt < current_lowest or (damage_dealt == current_lowest and
+                                               rank(permutation) < rank(worst_bar)):
+            current_lowest = damage_dealt
+            worst_bar = permutation
+            worst_count = bars
+        # --- The leaderboards list bars, so every bar sharing the rotation may be listed up to their size --- #
+        listed: List[List[str]] = [permutation]
+        if bars > 1 and max(top.size, bottom.size) > 1:
+            listed = list(itertools.islice(respecting_bars(before), max(top.size, bottom.size)))
+        if seek_best is True and damage_dealt >= top.threshold:
+            top.offer_run(damage_dealt, listed, bars)
+        if seek_worst is True and damage_dealt <= bottom.threshold:
+            bottom.offer_run(damage_dealt, listed, bars)
+        count(bars)
+
+    # The branches taken at a decision split its bars between them, so the last one gets the bars the others leave
+    def descend(rotation: Rotation, before: List[int], bars: int, finished: bool, seek_best: bool,
+                seek_worst: bool) -> None:
+        nonlocal pruned
+        while finished is False:
+            if bound is True:
+                seek_best = seek_best and upper_bound(rotation, top.threshold) >= top.threshold
+                seek_worst = seek_worst and rotation.damage_dealt / 10 <= bottom.threshold
+                if seek_best is False and seek_worst is False:
+                    pruned += 1
+                    count(bars)
+                    return
+            ready_mask: int = rotation.ready
+            # --- Abilities without a ready ability of higher priority could be used next, there are at least two --- #
+            choices: List[int] = [p for p in range(len(before))
+                                  if (ready_mask >> p) & 1 and before[p] & ready_mask == 0]
+            for choice in choices[:-1]:
+                branch: Rotation = rotation.copy()
+                decided: List[int] = constrain(before, choice, choices)
+                branch_bars: int = bar_count(decided)
+                bars -= branch_bars
+                descend(branch, decided, branch_bars, advance_rotation(branch, (), decided=decided), seek_best,
+                        seek_worst)
+            before = constrain(before, choices[-1], choices)
+            finished = advance_rotation(rotation, (), decided=before)
+        finish(rotation, before, bars, seek_best, seek_worst)
+
+    # --- A shard's prefix has priority over every other ability, in order, on top of dominance. The bars that break
+    # dominance are counted straight away --- #
+    start: List[int] = list(table.ordered)
+    for place, ability in enumerate(prefix):
+        start = constrain(start, positions[ability], [positions[a] for a in my_abilities if a not in prefix[:place]])
+    try:
+        bars: int = math.factorial(len(my_abilities) - len(prefix))
+        if len(dominance) > 0:
+            kept: int = bar_count(start) if keeps_order(tuple(positions[a] for a in prefix)) is True else 0
+            if kept < bars:
+                pruned += 1
+                count(bars - kept)
+            if kept == 0:
+                return
+            bars = kept
+        rotation: Rotation = start_rotation(False)
+        descend(rotation, start, bars, advance_rotation(rotation, (), decided=start), True, True)
+    finally:
+        save()
+
+
+# Everything the rest of a paused rotation depends on apart from the damage dealt so far, as for TranspositionTable
+def rotation_point(rotation: Rotation) -> tuple:
+    cooling: List[int] = [index for index in range(len(table.names)) if (rotation.cooling >> index) & 1]
+    return (rotation.time_elapsed, rotation.adrenaline, rotation.shards, rotation.current_buff, rotation.ready,
+            rotation.cooling, tuple(rotation.cooldown_left[index] for index in cooling), tuple(rotation.buff_order),
+            tuple(rotation.buff_left[index] for index in rotation.buff_order))
+
+
+# Finds the rotation dealing the most damage when every ability is picked by hand instead of by the priorities of a
+# bar. The rules are otherwise those of ability_rotation(): a ready ability is always used, and auto attacks fill the
+# time when none is. The search goes depth first over the ready abilities at each decision (the most damaging first),
+# keeping for each point of a rotation (see rotation_point()) the most damage the rest of the rotation can add and the
+# abilities that add it, as the rest does not depend on the damage dealt before. A branch is cut when
+# upper_bound_function() says it can not beat the best rotation so far, which starts out as incumbent (the damage of
+# the best bar). The damage found for a point with branches cut below it is only reused when the point is reached
+# again with no more damage dealt, since the same branches would be cut then. Returns the damage and abilities of the
+# best rotation found (None when nothing beats incumbent), whether the search finished, and how many points were
+# expanded, cut by the bound and answered by the points kept
+def solve_rotation(incumbent: float) -> Dict[str, object]:
+    upper_bound: Callable[[Rotation], float] = upper_bound_function()
+    order: List[int] = sorted(range(len(table.names)), key=lambda index: -table.damage[index])
+    # Damage dealt before the point, most damage the rest adds (in tenths), the abilities used for it as nested pairs
+    # (ability, rest), and whether no branches were cut below it
+    known: Dict[tuple, Tuple[int, int, Optional[tuple], bool]] = {}
+    choices: List[int] = []
+    best_damage: int = round(incumbent * 10)
+    best_choices: Optional[List[int]] = None
+    expanded: int = 0
+    cut: int = 0
+    reused: int = 0
+
+    # Returns the most damage the rest of rotation adds with the abilities used for it and whether it is exact, or None
+    # if it can not beat the best rotation
+    def descend(rotation: Rotation, finished: bool) -> Optional[Tuple[int, Optional[tuple], bool]]:
+        nonlocal best_damage, best_choices, expanded, cut, reused
+        damage_dealt: int = rotation.damage_dealt
+        if finished is True:
+            found: Optional[Tuple[int, Optional[tuple], bool]] = (0, None, True)
+        else:
+            point: tuple = rotation_point(rotation)
+            stored: Optional[Tuple[int, int, Optional[tuple], bool]] = known.get(point)
+            if stored is not None and (stored[3] is True or damage_dealt <= stored[0]):
+                reused += 1
+                found = stored[1:]
+            elif upper_bound(rotation) * 10 <= best_damage:
+                cut += 1
+                return None
+            else:
+                expanded += 1
+                found = None
+                exact: bool = True
+                ready: List[int] = [index for index in order if (rotation.ready >> index) & 1]
+                for place, choice in enumerate(ready):
+                    branch: Rotation = rotation if place == len(ready) - 1 else rotation.copy()
+                    choices.append(choice)
+                    done: bool = advance_rotation(branch, (choice,), False, True)
+                    # The last branch is rotation itself, so the damage of the step is taken before going deeper
+                    step: int = branch.damage_dealt - damage_dealt
+                    rest = descend(branch, done)
+                    choices.pop()
+                    if rest is None:
+                        exact = False
+                        continue
+                    exact = exact and rest[2]
+                    added: int = step + rest[0]
+                    if found is None or added > found[0]:
+                        found = (added, (choice, rest[1]), exact)
+                if found is None:
+                    return None
+                found = (found[0], found[1], exact)
+                known[point] = (damage_dealt,) + found
+        if damage_dealt + found[0] > best_damage:
+            best_damage = damage_dealt + found[0]
+            best_choices = list(choices)
+            tail: Optional[tuple] = found[1]
+            while tail is not None:
+                best_choices.append(tail[0])
+                tail = tail[1]
+        return found
+
+    complete: bool = True
+    try:
+        rotation: Rotation = start_rotation(False)
+        descend(rotation, advance_rotation(rotation, (), False))
+    except KeyboardInterrupt:
+        complete = False
+    solution: Dict[str, object] = {"damage": None, "abilities": None, "rotation": None, "complete": complete,
+                                   "expanded": expanded, "cut": cut, "reused": reused, "points": len(known)}
+    if best_choices is not None:
+        rotation = start_rotation(True)
+        advance_rotation(rotation, (), False)
+        for choice in best_choices:
+            advance_rotation(rotation, (choice,), False, True)
+        solution.update(damage=rotation.damage_dealt / 10, abilities=[table.names[choice] for choice in best_choices],
+                        rotation=rotation.ability_path)
+    return solution
+
+
+# Bars simulated together by the batch engine
+batch_size: int = 4096
+
+
+# Simulates many ability bars at once with NumPy, each row of bars being a full bar of table indices. Every bar goes
+# through the same steps as in advance_rotation(), but the state of all bars is kept in arrays and advanced in
+# lockstep: on each pass every unfinished bar uses its first ready ability, then an auto attack or an idle tick if
+# nothing is ready. Returns the damage dealt by each bar in tenths of a percent
+def simulate_batch(bars: "np.ndarray") -> "np.ndarray":
+    count, size = bars.shape
+
+    def column(mask: int) -> "np.ndarray":
+        return np.array([(mask >> index) & 1 == 1 for index in range(size)])
+
+    # --- Table columns --- #
+    damage = np.array(table.damage, dtype=float)
+    ticks = np.array(table.ticks)
+    cooldown = np.array(table.cooldown)
+    adrenaline_change = np.array(table.adrenaline)
+    channel = np.array(table.channel)
+    bleed = np.array(table.bleed)
+    walking_bleed = np.array(table.walking_bleed, dtype=float)
+    buff = np.array(table.buff)
+    effect = np.array([e if e is not None else 1 for e in table.effect], dtype=float)
+    basic, threshold, igneous, ultimate = (column(table.basic), column(table.threshold), column(table.igneous),
+                                           column(table.ultimate))
+    gated = threshold | igneous | ultimate
+    bleeds_column, special_bleeds_column = column(table.bleeds), column(table.special_bleeds)
+    walking_column, punishing_column, debilitating_column = (column(table.walking_bleeds), column(table.punishing),
+                                                             column(table.debilitating))
+    boosting: List[int] = [index for index in range(size) if (table.boosting >> index) & 1]
+    crit: List[int] = [index for index in range(size) if (table.crit_boost >> index) & 1]
+    crit_effect = np.array([buff_effect[table.names[index]] for index in crit], dtype=float)
+    bound: List[int] = [index for index in range(size) if (table.binds >> index) & 1]
+    last_auto: float = round(cycle_ticks - math.floor(cycle_ticks), 1)  # Time left for an auto attack at the end
+    # --- Every bar starts from the same opening auto attack --- #
+    opening: Rotation = start_rotation(False)
+    damage_dealt = np.full(count, opening.damage_dealt, dtype=np.int64)
+    current_buff = np.full(count, float(opening.current_buff))
+    time_elapsed = np.full(count, opening.time_elapsed, dtype=np.int64)
+    shards = np.zeros(count, dtype=np.int64)
+    adrenaline = np.full(count, opening.adrenaline, dtype=np.int64)
+    ready = np.tile(column(opening.ready), (count, 1))
+    cooldown_left = np.zeros((count, size), dtype=np.int64)  # Abilities on cooldown have ticks left
+    buff_left = np.zeros((count, size), dtype=np.int64)  # Active buffs have ticks left
+    buff_stamp = np.zeros((count, size), dtype=np.int64)  # Pass on which each buff was used, to keep their order
+    stopped = np.zeros(count, dtype=bool)
+
+    def usable(adrenaline_left: "np.ndarray") -> "np.ndarray":
+        return (basic | (threshold & (adrenaline_left >= 50)[:, None]) | (igneous & (adrenaline_left >= 60)[:, None]) |
+                (ultimate & (adrenaline_left == 100)[:, None]))
+
+    def adjust_cooldowns(rows: "np.ndarray", cooldown_time) -> None:
+        cooldown_time = np.asarray(cooldown_time).reshape(-1, 1)
+        left = cooldown_left[rows]
+        cooling = left > 0
+        left = np.where(cooling, left - cooldown_time, 0)
+        ready[rows] |= cooling & (left <= 0) & usable(adrenaline[rows])
+        cooldown_left[rows] = np.maximum(left, 0)
+        left = buff_left[rows]
+        active = left > 0
+        left = np.where(active, left - cooldown_time, 0)
+        expired = active & (left <= 0)
+        buff_left[rows] = np.maximum(left, 0)
+        for index in boosting:  # Buffs run out in the order of my_abilities
+            current_buff[rows] = np.where(expired[:, index], current_buff[rows] / effect[index], current_buff[rows])
+
+    def use(rows: "np.ndarray", chosen: "np.ndarray") -> None:
+        ready[rows, chosen] = False
+        adrenaline[rows] = np.minimum(np.where(ultimate[chosen], gain, adrenaline[rows] + adrenaline_change[chosen]),
+                                      100)
+        # --- Adding shards if they are used, or using them if activated --- #
+        if table.storm_shards >= 0:
+            storm = rows[chosen == table.storm_shards]
+            shards[storm] = np.minimum(shards[storm] + 1, 10)
+        if table.shatter >= 0:
+            shatter = rows[chosen == table.shatter]
+            damage_dealt[shatter] += shards[shatter] * 850
+            shards[shatter] = 0
+        # --- Crit boosts multiply in the order they were used --- #
+        damage_multiplier = np.ones(len(rows))
+        if len(crit) > 0:
+            left = buff_left[rows[:, None], crit]
+            order = np.argsort(np.where(left > 0, buff_stamp[rows[:, None], crit], stamp), axis=1, kind="stable")
+            channelled = channel[chosen][:, None]
+            factors = np.where(left < channelled, ((left / np.maximum(channelled, 1)) * (crit_effect - 1)) + 1,
+                               crit_effect)
+            factors = np.take_along_axis(np.where(left > 0, factors, 1.0), order, 1)
+            for place in range(len(crit)):
+                damage_multiplier = damage_multiplier * factors[:, place]
+        # --- Walking bleeds follow the binds, the last bind used decides unless one lasts longer than the bleed --- #
+        bleed_multiplier = np.ones(len(rows))
+        if walking_column.any():
+            walking = walking_bleed[chosen]
+            if len(bound) > 0 and table.debilitating:
+                left = buff_left[rows[:, None], bound]
+                active = left > 0
+                last = np.argmax(np.where(active, buff_stamp[rows[:, None], bound], -1), axis=1)
+                last_left = left[np.arange(len(rows)), last]
+                bleed_ticks_left = bleed[chosen]
+                shorter = (~active | (left < bleed_ticks_left[:, None])).all(axis=1)
+                walking = np.where(active.any(axis=1), np.where(
+                    shorter, walking * (1 + last_left / np.maximum(bleed_ticks_left, 1)), 1.0), walking)
+            bleed_multiplier = np.where(walking_column[chosen], walking, 1.0)
+        # --- Channelled abilities and bleeds cut short by the end of the rotation --- #
+        time_left = cycle_ticks - time_elapsed[rows]
+        time_multiplier = np.where(time_left < bleed[chosen], time_left / np.maximum(bleed[chosen], 1),
+                                   np.where(time_left < channel[chosen], time_left / np.maximum(channel[chosen], 1),
+                                            1.0))
+        # --- Calculating how much damage abilities should do --- #
+        ability_damage = damage[chosen]
+        smoke = chosen == table.smoke_tendrils
+        damage_dealt[rows[smoke]] += np.rint(ability_damage[smoke] * damage_multiplier[smoke]).astype(np.int64)
+        bleed_damage = np.where(special_bleeds_column[chosen] & ~smoke, (1128 * damage_multiplier) + 3133.3,
+                                ability_damage)
+        punished = punishing_column[chosen] & (buff_left[rows][:, debilitating_column] > 0).any(axis=1)
+        damage_dealt[rows] += np.rint(np.where(
+            bleeds_column[chosen], bleed_damage * bleed_multiplier * time_multiplier,
+            np.where(punished, ability_damage * effect[chosen] * damage_multiplier * time_multiplier,
+                     ability_damage * damage_multiplier * time_multiplier))).astype(np.int64)
+        # --- Increasing rotation duration and managing cooldowns --- #
+        time_elapsed[rows] += ticks[chosen]
+        cooldown_left[rows, chosen] = cooldown[chosen]
+        buffing = buff[chosen] > 0
+        buffed_rows, buffs = rows[buffing], chosen[buffing]
+        fresh = buff_left[buffed_rows, buffs] <= 0
+        buff_stamp[buffed_rows[fresh], buffs[fresh]] = stamp
+        buff_left[buffed_rows, buffs] = buff[buffs]
+        boosted = column(table.boosting)[buffs]
+        current_buff[buffed_rows[boosted]] = current_buff[buffed_rows[boosted]] * effect[buffs[boosted]]
+        adjust_cooldowns(rows, ticks[chosen])
+
+    stamp: int = 0
+    running = time_elapsed < cycle_ticks
+    while running.any():
+        stamp += 1
+        rows = np.flatnonzero(running)
+        # --- First ready ability of each bar, in its own priority order --- #
+        by_priority = ready[rows[:, None], bars[rows]]
+        found = by_priority.any(axis=1)
+        if found.any():
+            use(rows[found], bars[rows[found], by_priority[found].argmax(axis=1)])
+        # --- Determines whether thresholds or ultimates may be used --- #
+        rows = rows[time_elapsed[rows] < cycle_ticks]
+        ready[rows] = (ready[rows] & ~gated) | (usable(adrenaline[rows]) & gated & (cooldown_left[rows] <= 0))
+        # --- Bars without a ready ability use an auto attack, or wait a tick --- #
+        rows = rows[~ready[rows].any(axis=1)]
+        left = cooldown_left[rows]
+        auto = ((left <= 0) | (left >= attack_speed_ticks)).all(axis=1)
+        waiting = rows[~auto]
+        rows = rows[auto]
+        late = time_elapsed[rows] + attack_speed_ticks > cycle_ticks
+        stopped[rows[late]] = True
+        rows = rows[~late]
+        time_elapsed[rows] += attack_speed_ticks
+        damage_dealt[rows] += np.rint(np.where(cycle_ticks - time_elapsed[rows] >= 1, 500 * current_buff[rows],
+                                               500 * last_auto * current_buff[rows])).astype(np.int64)
+        adrenaline[rows] = np.minimum(adrenaline[rows] + auto_adrenaline, 100)
+        time_elapsed[rows] += 1
+        adjust_cooldowns(rows, attack_speed_ticks + 1)
+        time_elapsed[waiting] += 1
+        adjust_cooldowns(waiting, 1)
+        running = (time_elapsed < cycle_ticks) & ~stopped
+    return damage_dealt
+
+
+# Tests the same ability bars as search_bars (skipping the same ones), batch_size bars at a time with simulate_batch()
+def search_batch(prefix: Tuple[str, ...], results: Dict[str, object], report=None) -> None:
+    current_highest: float = results["highest"]
+    current_lowest: float = results["lowest"]
+    best_bar: Optional[List[str]] = results["best_bar"]
+    worst_bar: Optional[List[str]] = results["worst_bar"]
+    runthrough: int = results["bars"]
+    simulated: int = results["simulated"] - runthrough  # Every bar is simulated on its own
+    top: Leaderboard = results["top"]
+    bottom: Leaderboard = results["bottom"]
+    pruned: int = results["pruned"]
+    start: Tuple[int, ...] = tuple(table.index[ability] for ability in prefix)
+    if len(dominance) > 0:
+        permutations: Iterator[object] = ordered_permutations(prefix, [a for a in my_abilities if a not in prefix])
+    else:
+        permutations = itertools.permutations([index for index, ability in enumerate(my_abilities)
+                                               if ability not in prefix])
+
+    def save() -> None:
+        results.update(highest=current_highest, best_bar=best_bar, lowest=current_lowest, worst_bar=worst_bar,
+                       best_count=int(best_bar is not None), worst_count=int(worst_bar is not None), bars=runthrough,
+                       simulated=simulated + runthrough, pruned=pruned)
+
+    try:
+        while True:
+            taken: List[object] = list(itertools.islice(permutations, batch_size))
+            if len(taken) == 0:
+                break
+            # --- Runs of bars that break dominance are only counted --- #
+            chunk: List[Tuple[int, ...]] = [start + remainder for remainder in taken if type(remainder) is tuple]
+            skipped: int = sum(remainder for remainder in taken if type(remainder) is int)
+            previous: int = runthrough
+            if skipped > 0:
+                pruned += len(taken) - len(chunk)
+                simulated -= skipped
+                runthrough += skipped
+            if len(chunk) == 0:
+                if report is not None and runthrough // report_every > previous // report_every:
+                    save()
+                    report(results)
+                continue
+            damage_dealt = simulate_batch(np.array(chunk)) / 10
+            # --- Check if any better/worse bars have been found, the first of equal bars wins --- #
+            best: int = int(damage_dealt.argmax())
+            if damage_dealt[best] > current_highest:
+                if report is not None:
+                    highest = np.maximum.accumulate(np.concatenate(([current_highest], damage_dealt[:-1])))
+                    for position in np.flatnonzero(damage_dealt > highest):
+                        print(f"New best bar with damage {float(damage_dealt[position])}: "
+                              f"{[my_abilities[index] for index in chunk[position]]}")
+                current_highest = float(damage_dealt[best])
+                best_bar = [my_abilities[index] for index in chunk[best]]
+            worst: int = int(damage_dealt.argmin())
+            if damage_dealt[worst] < current_lowest:
+                current_lowest = float(damage_dealt[worst])
+                worst_bar = [my_abilities[index] for index in chunk[worst]]
+            for position in np.flatnonzero(damage_dealt > top.threshold):
+                if damage_dealt[position] > top.threshold:
+                    top.offer(float(damage_dealt[position]), [my_abilities[index] for index in chunk[position]])
+            for position in np.flatnonzero(damage_dealt < bottom.threshold):
+                if damage_dealt[position] < bottom.threshold:
+                    bottom.offer(float(damage_dealt[position]), [my_abilities[index] for index in chunk[position]])
+            runthrough += len(chunk)
+            if report is not None and runthrough // report_every > previous // report_every:
+                save()
+                report(results)
+    finally:
+        save()
+
+
+# Simulates the first bars in permutation order with ability_rotation() and with simulate_batch(), and prints how many
+# bars per second each of them manages
+def benchmark_batch(bars: int) -> None:
+    permutations: List[Tuple[str, ...]] = list(itertools.islice(itertools.permutations(my_abilities), bars))
+    indices = np.array([[table.index[ability] for ability in permutation] for permutation in permutations])
+    start: float = time.perf_counter()
+    expected: List[float] = [ability_rotation(permutation, False) for permutation in permutations]
+    scalar: float = time.perf_counter() - start
+    start = time.perf_counter()
+    damage_dealt = np.concatenate([simulate_batch(indices[first:first + batch_size])
+                                   for first in range(0, len(indices), batch_size)]) / 10
+    batch: float = time.perf_counter() - start
+    print(f"ability_rotation(): {len(permutations)} bars in {scalar:.2f} seconds, "
+          f"{len(permutations) / scalar:.0f} bars/second")
+    print(f"Batch engine: {len(permutations)} bars in {batch:.2f} seconds, {len(permutations) / batch:.0f} "
+          f"bars/second ({scalar / batch:.1f}x)")
+    mismatches: int = int((damage_dealt != np.array(expected)).sum())
+    if mismatches > 0:
+        print(f"Warning: {mismatches} bars dealt different damage in the batch engine.")
+
+
+# Searches a random part of the ability bars for up to seconds or evaluations bars (whichever runs out first), for
+# ability sets too large to test every bar. method is "annealing" (simulated annealing from a random bar, moving to a
+# bar with two abilities swapped or one ability moved elsewhere) or "genetic" (a population of bars bred with order
+# crossover and mutated with the same moves). Bars are simulated by ability_rotation(), through a transposition table of
+# memory bytes if given, and the same seed gives the same search for an evaluation budget. Stores the best and worst
+# bars in results as the other searches do, plus the convergence curve in results["curve"]: the evaluations, seconds
+# and best damage each time the best bar improved
+def search_heuristic(method: str, seed: int, seconds: Optional[float], evaluations: Optional[int],
+                     results: Dict[str, object], report=None, memory: int = 0) -> None:
+    rng: random.Random = random.Random(seed)
+    size: int = len(my_abilities)
+    current_highest: float = results["highest"]
+    current_lowest: float = results["lowest"]
+    best_bar: Optional[List[str]] = results["best_bar"]
+    worst_bar: Optional[List[str]] = results["worst_bar"]
+    top: Leaderboard = results["top"]
+    bottom: Leaderboard = results["bottom"]
     runthrough: int = 0
-    # --- Tracking of highest and lowest damaging ability bars  --- #
-    current_highest: float = 0
-    current_lowest: float = float("inf")
+    curve: List[Tuple[int, float, float]] = []
+    memo: Optional[TranspositionTable] = transposition_table(memory) if memory > 0 else None
+    counted: List[int] = [memo.lookups, memo.hits, memo.evictions] if memo is not None else []
+    started: float = time.perf_counter()
+    deadline: float = started + seconds if seconds is not None else float("inf")
+    limit: float = evaluations if evaluations is not None else float("inf")
+
+    def save() -> None:
+        results.update(highest=current_highest, best_bar=best_bar, lowest=current_lowest, worst_bar=worst_bar,
+                       best_count=int(best_bar is not None), worst_count=int(worst_bar is not None),
+                       bars=results["bars"] + runthrough, simulated=results["simulated"] + runthrough, curve=curve)
+        count_transpositions(results, memo, counted)
+
+    # Share of the budget used so far, from 0 to 1
+    def spent() -> float:
+        return max(runthrough / limit, (time.perf_counter() - started) / (deadline - started))
+
+    def evaluate(bar: List[str]) -> float:
+        nonlocal current_highest, current_lowest, best_bar, worst_bar, runthrough
+        damage_dealt: float = ability_rotation(tuple(bar), False, memo)
+        runthrough += 1
+        if damage_dealt > current_highest:
+            current_highest = damage_dealt
+            best_bar = list(bar)
+            curve.append((runthrough, round(time.perf_counter() - started, 3), damage_dealt))
+            if report is not None:
+                print(f"New best bar with damage {current_highest}: {best_bar}")
+        if damage_dealt < current_lowest:
+            current_lowest = damage_dealt
+            worst_bar = list(bar)
+        # The search comes back to the same bars, which are only listed once
+        if damage_dealt > top.threshold and all(entry[2] != bar for entry in top.heap):
+            top.offer(damage_dealt, bar)
+        if damage_dealt < bottom.threshold and all(entry[2] != bar for entry in bottom.heap):
+            bottom.offer(damage_dealt, bar)
+        return damage_dealt
+
+    # Swaps two abilities of bar or moves one of them elsewhere
+    def neighbour(bar: List[str]) -> List[str]:
+        first, second = rng.sample(range(size), 2)
+        bar = list(bar)
+        if rng.random() < 0.5:
+            bar[first], bar[second] = bar[second], bar[first]
+        else:
+            bar.insert(second, bar.pop(first))
+        return bar
+
+    # Keeps a random slice of mother in place and fills the rest with the other abilities in the order of father,
+    # starting after the slice
+    def crossover(mother: List[str], father: List[str]) -> List[str]:
+        first, last = sorted(rng.sample(range(size + 1), 2))
+        kept: set = set(mother[first:last])
+        child: List[str] = list(mother)
+        others: List[str] = [ability for ability in father[last:] + father[:last] if ability not in kept]
+        for position, ability in zip(list(range(last, size)) + list(range(first)), others):
+            child[position] = ability
+        return child
+
+    try:
+        bar: List[str] = list(my_abilities)
+        rng.shuffle(bar)
+        damage_dealt: float = evaluate(bar)
+        if size < 2:
+            return
+        if method == "annealing":
+            # Cools from 2% of the damage of the first bar down to a thousandth of that by the end of the budget
+            heat: float = max(damage_dealt, 1) * 0.02
+            while spent() < 1:
+                temperature: float = heat * 0.001 ** spent()
+                candidate: List[str] = neighbour(bar)
+                candidate_damage: float = evaluate(candidate)
+                if candidate_damage >= damage_dealt or \
+                        rng.random() < math.exp((candidate_damage - damage_dealt) / temperature):
+                    bar, damage_dealt = candidate, candidate_damage
+        else:
+            population: List[Tuple[float, List[str]]] = [(damage_dealt, bar)]
+            while len(population) < 40 and spent() < 1:
+                bar = list(my_abilities)
+                rng.shuffle(bar)
+                population.append((evaluate(bar), bar))
+
+            # The best of three bars picked at random
+            def tournament() -> List[str]:
+                return max(rng.sample(population, min(3, len(population))), key=lambda entry: entry[0])[1]
+
+            while spent() < 1:
+                children: List[Tuple[float, List[str]]] = [max(population, key=lambda entry: entry[0])]
+                while len(children) < len(population) and spent() < 1:
+                    child: List[str] = crossover(tournament(), tournament())
+                    if rng.random() < 0.3:
+                        child = neighbour(child)
+                    children.append((evaluate(child), child))
+                population = children
+    finally:
+        save()
+
+
+# Entry point for worker processes of --heuristic, returns the results of a single start
+def heuristic_start(job: Tuple[str, int, Optional[float], Optional[int], int, Tuple[int, int]]) -> Dict[str, object]:
+    method, seed, seconds, evaluations, memory, sizes = job
+    results = new_results(*sizes)
+    counted_search(search_heuristic, results, method, seed, seconds, evaluations, results, memory=memory)
+    return results
+
+
+# Runs one --heuristic search per worker, each from its own seed (seed, seed + 1, ...), and merges them into results.
+# Returns the convergence curve of each search
+def run_heuristic(args: argparse.Namespace, seed: int, options: Dict[str, object], results: Dict[str, object],
+                  report=None) -> List[List[Tuple[int, float, float]]]:
+    seconds: Optional[float] = args.budget if args.budget is not None or args.evaluations is not None else 60
+    memory: int = options.get("memory", 0)  # The only option of the engines that applies to these searches
+    if args.workers == 1:
+        try:
+            search_heuristic(args.heuristic, seed, seconds, args.evaluations, results, report, memory)
+        except KeyboardInterrupt:
+            print("\nProcess terminated!")
+        return [results["curve"]]
+    jobs = [(args.heuristic, seed + start, seconds, args.evaluations, memory, (args.top, args.bottom))
+            for start in range(args.workers)]
+    context = multiprocessing.get_context()
+    settings = None if context.get_start_method() == "fork" else current_settings()
+    pool = context.Pool(args.workers, init_worker, (settings, counters is not None))
+    curves: List[List[Tuple[int, float, float]]] = []
+    try:
+        for start in pool.imap(heuristic_start, jobs):
+            if merge_results(results, start) and report is not None:
+                print(f"New best bar with damage {results['highest']}: {results['best_bar']}")
+            curves.append(start["curve"])
+        pool.close()
+    except KeyboardInterrupt:
+        pool.terminate()
+        print("\nProcess terminated!")
+    except Exception:
+        pool.terminate()  # A worker failed, its error is raised once the pool is shut down
+        raise
+    finally:
+        pool.join()
+    return curves
+
+
+# Micro-benchmarks of the simulator for the current settings, in microseconds per call: ability_rotation() for the
+# first calls bars in permutation order, Rotation.copy(), and one decision of advance_rotation() (using an ability,
+# then adjust_cooldowns() and the readiness checks until the next decision), over the decisions of the first bar. Each
+# is the fastest of three runs
+def micro_benchmarks(calls: int = 200) -> Dict[str, float]:
+    bars: List[Tuple[str, ...]] = list(itertools.islice(itertools.permutations(my_abilities), calls))
+    rotation: Rotation = start_rotation(False)
+    finished: bool = advance_rotation(rotation, (), False)
+    decisions: List[Tuple[Rotation, int]] = []
+    while finished is False:
+        choice: int = next(table.index[ability] for ability in bars[0] if (rotation.ready >> table.index[ability]) & 1)
+        decisions.append((rotation.copy(), choice))
+        finished = advance_rotation(rotation, (choice,), False, True)
+    timings: Dict[str, float] = {"ability_rotation": float("inf"), "copy": float("inf"), "decision": float("inf")}
+    for _ in range(3):
+        started: float = time.perf_counter()
+        for bar in bars:
+            ability_rotation(bar, False)
+        timings["ability_rotation"] = min(timings["ability_rotation"], (time.perf_counter() - started) / len(bars))
+        started = time.perf_counter()
+        copies: List[Rotation] = [paused.copy() for paused, _ in decisions]
+        if len(decisions) > 0:
+            timings["copy"] = min(timings["copy"], (time.perf_counter() - started) / len(decisions))
+        started = time.perf_counter()
+        for paused, (_, choice) in zip(copies, decisions):
+            advance_rotation(paused, (choice,), False, True)
+        if len(decisions) > 0:
+            timings["decision"] = min(timings["decision"], (time.perf_counter() - started) / len(decisions))
+    return {name: round(seconds * 1e6, 2) if seconds < float("inf") else None for name, seconds in timings.items()}
+
+
+# Entry point for the worker process of a --suite workload, which searches the first bars of its settings with engine
+# and returns how fast that went, the peak memory of the process (in MB, None where it can not be measured) and the
+# micro-benchmarks of the simulator
+def run_workload(job: Tuple[str, Dict[str, object], int, Dict[str, object]]) -> Dict[str, object]:
+    engine, options, bars, settings = job
+    use_settings(settings)
+    micro: Dict[str, float] = micro_benchmarks()
+    results: Dict[str, object] = new_results()
+    started: float = time.perf_counter()
+    for prefix in limit_prefixes([()], bars):
+        engines[engine](prefix, results, **options)
+    seconds: float = time.perf_counter() - started
+    peak: Optional[float] = None
+    if resource is not None:  # Kilobytes, but bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return {"abilities": len(my_abilities), "ticks": cycle_ticks, "bars": results["bars"],
+            "simulations": results["simulated"], "seconds": round(seconds, 3),
+            "bars_per_second": round(results["bars"] / seconds, 1),
+            "ticks_per_second": round(results["simulated"] * cycle_ticks / seconds),
+            "peak_rss_mb": round(peak, 1) if peak is not None else None, "highest": results["highest"],
+            "best_bar": results["best_bar"], "microseconds": micro}
+
+
+# Search engines selectable with --engine
+engines: Dict[str, object] = {"permutations": search_bars,
+                              "tree": search_tree,
+                              "traces": search_traces,
+                              "batch": search_batch}
+
+
+# Entry point for worker processes, returns the best and worst bars of a single shard. Jobs of --configs runs carry the
+# settings of their configuration, and record the seconds spent on them
+def search_shard(job: Tuple[str, Tuple[str, ...], Dict[str, object], Tuple[int, int], Optional[Dict[str, object]]]
+                 ) -> Dict[str, object]:
+    engine, prefix, options, sizes, settings = job
+    if settings is not None:
+        use_settings(settings)
+    started: float = time.time()
+    results = new_results(*sizes)
+    counted_search(engines[engine], results, prefix, results, **options)
+    results["seconds"] = time.time() - started
+    return results
+
+
+# Merges the results of a shard into results. Shards must be merged in the order they were created so that ties are
+# broken the same way as a single process run. Returns True if the shard holds a new best bar
+def merge_results(results: Dict[str, object], shard: Dict[str, object]) -> bool:
+    improved: bool = False
+    if shard["highest"] > results["highest"]:
+        results.update(highest=shard["highest"], best_bar=shard["best_bar"], best_count=shard["best_count"])
+        improved = True
+    if shard["lowest"] < results["lowest"]:
+        results.update(lowest=shard["lowest"], worst_bar=shard["worst_bar"], worst_count=shard["worst_count"])
+    results["top"].merge(shard["top"])
+    results["bottom"].merge(shard["bottom"])
+    results["bars"] += shard["bars"]
+    results["simulated"] += shard["simulated"]
+    results["pruned"] += shard["pruned"]
+    for key in ("memo_lookups", "memo_hits", "memo_evictions"):
+        results[key] += shard[key]
+    if "horizons" in shard:
+        for shorter, shard_shorter in zip(results.setdefault("horizons", [new_results(
+                results["top"].size, results["bottom"].size) for _ in shard["horizons"]]), shard["horizons"]):
+            merge_results(shorter, shard_shorter)
+    if "runs" in shard:
+        offset: int = len(results.setdefault("states", []))
+        results["states"] += shard["states"]
+        results.setdefault("runs", []).extend([index + offset, bars] for index, bars in shard["runs"])
+    if counters is not None and "counters" in shard:
+        for name in counter_names:
+            counters[name] += shard["counters"][name]
+    return improved
+
+
+# Searches run without recording rotations, so the rotations of the best and worst bars (and of the leaderboards) are
+# found by simulating those bars once more, up to horizon (in ticks) for the results of a shorter time
+def record_rotations(results: Dict[str, object], horizon: Optional[float] = None) -> None:
+    if results["best_bar"] is not None:
+        ability_rotation(tuple(results["best_bar"]), horizon=horizon)
+        results["best_rotation"] = ability_path
+    if results["worst_bar"] is not None:
+        ability_rotation(tuple(results["worst_bar"]), horizon=horizon)
+        results["worst_rotation"] = ability_path
+    for board in ("top", "bottom"):
+        results[board + "_rotations"] = []
+        for _, bar, _ in results[board].entries():
+            ability_rotation(tuple(bar), horizon=horizon)
+            results[board + "_rotations"].append(ability_path)
+
+
+# Collects the results of a search for --json. Damage is a percentage, and bars is how many ability bars share the
+# rotation of a bar (always 1 with the permutations and batch engines)
+def results_json(results: Dict[str, object], engine: str, elapsed: float) -> Dict[str, object]:
+    def entry(damage_dealt: float, bar: Optional[List[str]], count: int, rotation: List[str]) -> Optional[dict]:
+        if bar is None:
+            return None
+        return {"damage": damage_dealt, "bar": bar, "bars": count, "rotation": rotation}
+
+    return {"settings": current_settings(), "engine": engine, "bars_evaluated": results["bars"],
+            "bars_total": math.factorial(len(my_abilities)), "simulations": results["simulated"],
+            "pruned": results["pruned"], "elapsed_seconds": round(elapsed, 3),
+            "transpositions": {"lookups": results["memo_lookups"], "hits": results["memo_hits"],
+                               "evictions": results["memo_evictions"]},
+            "best": entry(results["highest"], results["best_bar"], results["best_count"], results["best_rotation"]),
+            "worst": entry(results["lowest"], results["worst_bar"], results["worst_count"], results["worst_rotation"]),
+            "top": [entry(*board_entry, rotation) for board_entry, rotation in
+                    zip(results["top"].entries(), results["top_rotations"])],
+            "bottom": [entry(*board_entry, rotation) for board_entry, rotation in
+                       zip(results["bottom"].entries(), results["bottom_rotations"])]}
+
+
+# Returns the rank of bar in permutation order, its Lehmer code read as a number
+def bar_rank(bar: List[str]) -> int:
+    remaining: List[str] = list(my_abilities)
+    rank: int = 0
+    for place, ability in enumerate(bar):
+        position: int = remaining.index(ability)
+        rank += position * math.factorial(len(my_abilities) - place - 1)
+        remaining.pop(position)
+    return rank
+
+
+# Returns the ability bar at rank in permutation order, by reading rank as a Lehmer code
+def unrank(rank: int) -> Tuple[str, ...]:
+    remaining: List[str] = list(my_abilities)
+    bar: List[str] = []
+    for place in range(len(remaining), 0, -1):
+        position, rank = divmod(rank, math.factorial(place - 1))
+        bar.append(remaining.pop(position))
+    return tuple(bar)
+
+
+# Returns prefixes whose ability bars, one prefix after another, are exactly the bars from rank onwards in permutation
+# order: the bar at rank itself, then for each earlier place the abilities that come after it there
+def resume_prefixes(rank: int) -> List[Tuple[str, ...]]:
+    if rank == 0:
+        return [()]
+    if rank >= math.factorial(len(my_abilities)):
+        return []
+    bar: Tuple[str, ...] = unrank(rank)
+    prefixes: List[Tuple[str, ...]] = [bar]
+    for place in range(len(bar) - 1, -1, -1):
+        remaining: List[str] = [a for a in my_abilities if a not in bar[:place]]
+        prefixes += [bar[:place] + (ability,) for ability in remaining[remaining.index(bar[place]) + 1:]]
+    return prefixes
+
+
+# Returns the first prefixes of prefixes (split further where needed) that cover the first limit bars among theirs
+def limit_prefixes(prefixes: List[Tuple[str, ...]], limit: int) -> List[Tuple[str, ...]]:
+    limited: List[Tuple[str, ...]] = []
+    for prefix in prefixes:
+        count: int = math.factorial(len(my_abilities) - len(prefix))
+        if count > limit:
+            if limit > 0:
+                limited += limit_prefixes([prefix + (ability,) for ability in my_abilities if ability not in prefix],
+                                          limit)
+            break
+        limited.append(prefix)
+        limit -= count
+    return limited
+
+
+# Reorders my_abilities so that permutation order starts with the most promising bars (--anytime). Each place in turn
+# gets the ability whose bar deals the most damage with it there, the abilities placed before in front and the others
+# after it in their current order. Simulating whole bars weighs the damage, buffs and adrenaline of the abilities
+# together, and the first bar searched is then already a good one
+def promising_order() -> None:
+    global my_abilities
+    order: List[str] = list(my_abilities)
+    for place in range(len(order) - 1):
+        damage: List[float] = [ability_rotation(tuple(order[:place] + [order[candidate]] + order[place:candidate] +
+                                                      order[candidate + 1:]), False)
+                               for candidate in range(place, len(order))]
+        order.insert(place, order.pop(place + damage.index(max(damage))))
+    my_abilities = order
+    compile_table()
+
+
+# Finds the pairs of abilities where having the second ahead of the first can never help (--dominance): the first
+# deals at least as much damage, and the two are alike in everything else (type, adrenaline, time to use, cooldown,
+# channel and whether they are ready at the start), and neither does anything besides its own damage (no buffs,
+# bleeds, binds, stuns or storm shards). Swapping two such abilities in a bar then gives the same rotation with each one
+# used where the other was, and the one ranked higher is used at least as often, as the other is only used while it
+# cools down. So no pairs are found when a critical hit boost is among the abilities, which would make some uses of an
+# ability worth more than others. Of two abilities that are alike in all of this, the first one in my_abilities goes
+# first
+def dominance_pairs() -> List[Tuple[str, str]]:
+    if table.crit_boost != 0:
+        return []
+    effects: int = (table.bleeds | table.special_bleeds | table.walking_bleeds | table.binds | table.debilitating |
+                    table.punishing | table.boosting)
+    plain: List[int] = [index for index, ability in enumerate(my_abilities)
+                        if not (effects >> index) & 1 and table.buff[index] == 0 and table.bleed[index] == 0 and
+                        index not in (table.storm_shards, table.shatter, table.smoke_tendrils) and
+                        ability not in special_abilities]
+
+    # Everything but damage that decides when an ability is used and what it does to the rest of the rotation
+    def timing(index: int) -> Tuple[object, ...]:
+        return (ability_type[my_abilities[index]], table.adrenaline[index], table.ticks[index],
+                table.cooldown[index], table.channel[index], (table.initially_ready >> index) & 1)
+
+    pairs: List[Tuple[str, str]] = []
+    for first in plain:
+        for second in plain:
+            if first != second and timing(first) == timing(second) and (
+                    table.damage[first] > table.damage[second] or
+                    (table.damage[first] == table.damage[second] and first < second)):
+                pairs.append((my_abilities[first], my_abilities[second]))
+    return pairs
+
+
+# Restricts the search to the bars where every pair found by dominance_pairs() keeps its order. my_abilities is put in
+# an order that does so, keeping the current order as far as it can, so that the first bar of every shard and the bars
+# chosen to stand for a rotation keep to it as well
+def dominance_order() -> None:
+    global my_abilities, dominance
+    dominance = dominance_pairs()
+    order: List[str] = []
+    rest: List[str] = list(my_abilities)
+    while len(rest) > 0:
+        ability: str = next(a for a in rest if all(first not in rest for first, second in dominance if second == a))
+        order.append(ability)
+        rest.remove(ability)
+    my_abilities = order
+    compile_table()
+
+
+# Splits the permutations from rank onwards into shards sharing the same leading abilities, with enough shards to keep
+# every worker busy
+def shard_prefixes(workers: int, rank: int = 0) -> List[Tuple[str, ...]]:
+    length: int = 0
+    while length < len(my_abilities) - 1 and math.perm(len(my_abilities), length) < workers * 8:
+        length += 1
+    prefixes: List[Tuple[str, ...]] = []
+    for prefix in resume_prefixes(rank):
+        if len(prefix) >= length:
+            prefixes.append(prefix)
+        else:
+            prefixes += [prefix + rest for rest in
+                         itertools.permutations([a for a in my_abilities if a not in prefix], length - len(prefix))]
+    return prefixes
+
+
+# Identifies the settings a checkpoint was made with (the current ones by default). The order of the abilities matters,
+# as it decides the order of the bars
+def config_hash(settings: Optional[Dict[str, object]] = None) -> str:
+    if settings is None:
+        settings = current_settings()
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+
+# Results that are kept in a checkpoint, the rotations are simulated again at the end
+checkpoint_keys: Tuple[str, ...] = ("highest", "best_bar", "lowest", "worst_bar", "best_count", "worst_count", "bars",
+                                    "simulated", "pruned")
+
+
+# The results of a search in a form that can be saved as JSON, as kept by checkpoints and sent by --worker
+def results_state(results: Dict[str, object]) -> Dict[str, object]:
+    return {"results": {key: results[key] for key in checkpoint_keys},
+            "leaderboards": {board: {"size": results[board].size, "entries": results[board].entries()}
+                             for board in ("top", "bottom")}}
+
+
+# Adds the results saved by results_state() to results (as made by new_results())
+def restore_results(state: Dict[str, object], results: Dict[str, object]) -> None:
+    results.update(state["results"])
+    for board in ("top", "bottom"):
+        for damage_dealt, bar, count in state["leaderboards"][board]["entries"]:
+            results[board].offer(damage_dealt, bar, count)
+
+
+# Saves the progress of a search to path. results must cover exactly the bars before rank in permutation order. The
+# file is replaced in one step, so it stays whole if the process is killed while writing it
+def save_checkpoint(path: str, engine: str, results: Dict[str, object]) -> None:
+    rank: int = results["bars"]
+    state: Dict[str, object] = {"config": config_hash(), "engine": engine, "rank": rank,
+                                "next_bar": list(unrank(rank)) if rank < math.factorial(len(my_abilities)) else None}
+    state.update(results_state(results))
+    with open(path + ".tmp", "w") as checkpoint:
+        json.dump(state, checkpoint)
+    os.replace(path + ".tmp", path)
+
+
+# Loads a checkpoint made by save_checkpoint() into results, and returns its rank. Returns None if it was made with
+# other settings, another engine or other leaderboard sizes
+def load_checkpoint(path: str, engine: str, results: Dict[str, object]) -> Optional[int]:
+    with open(path, "r") as checkpoint:
+        state: Dict[str, object] = json.load(checkpoint)
+    if state["config"] != config_hash() or state["engine"] != engine or any(
+            state["leaderboards"][board]["size"] != results[board].size for board in ("top", "bottom")):
+        return None
+    restore_results(state, results)
+    return state["rank"]
+
+
+# Ticks before the end of a rotation from which the time it ends at can change what happens: abilities and bleeds may
+# be cut short, and auto attacks may not fit. Up to then, a rotation goes the same way for any longer time
+def horizon_margin() -> int:
+    return max(table.bleed + table.channel + [attack_speed_ticks + 1])
+
+
+# Everything a paused rotation needs to carry on, as a tuple that can be saved as JSON. Cooldowns and buffs that are not
+# running are left out, so rotations that carry on the same way give the same tuple
+def rotation_state(rotation: Rotation) -> tuple:
+    return (rotation.damage_dealt, rotation.current_buff, rotation.time_elapsed, rotation.shards, rotation.adrenaline,
+            rotation.ready, rotation.cooling, rotation.buffed,
+            tuple(left if (rotation.cooling >> index) & 1 else 0 for index, left in enumerate(rotation.cooldown_left)),
+            tuple(left if (rotation.buffed >> index) & 1 else 0 for index, left in enumerate(rotation.buff_left)),
+            tuple(rotation.buff_order))
+
+
+# Turns a tuple made by rotation_state() back into a rotation, which is not recorded
+def restore_rotation(state: tuple) -> Rotation:
+    rotation = Rotation()
+    (rotation.damage_dealt, rotation.current_buff, rotation.time_elapsed, rotation.shards, rotation.adrenaline,
+     rotation.ready, rotation.cooling, rotation.buffed) = state[:8]
+    rotation.cooldown_left = list(state[8])
+    rotation.buff_left = list(state[9])
+    rotation.buff_order = list(state[10])
+    rotation.ability_path = None
+    return rotation
+
+
+# Saves the states of every bar found by a search with until (--save-horizon) to path, replacing the file in one step
+def save_horizon(path: str, results: Dict[str, object], until: int) -> None:
+    state: Dict[str, object] = {"config": current_settings(), "cycle_ticks": cycle_ticks, "until": until,
+                                "states": results["states"], "runs": results["runs"]}
+    with open(path + ".tmp", "w") as horizon:
+        json.dump(state, horizon)
+    os.replace(path + ".tmp", path)
+
+
+# Loads the states saved by save_horizon() for --extend, and puts my_abilities back in the order they were saved in.
+# Returns None if they were saved with other settings, apart from the time
+def load_horizon(path: str) -> Optional[Dict[str, object]]:
+    global my_abilities
+    with open(path, "r") as horizon:
+        saved: Dict[str, object] = json.load(horizon)
+    settings: Dict[str, object] = saved["config"]
+    current: Dict[str, object] = current_settings()
+    if settings.keys() != current.keys() or sorted(settings["my_abilities"]) != sorted(my_abilities) or any(
+            settings[key] != current[key] for key in current if key not in ("my_abilities", "cycle_duration")):
+        return None
+    my_abilities = list(settings["my_abilities"])
+    compile_table()
+    saved["states"] = [tuple(state[:8]) + tuple(tuple(part) for part in state[8:]) for state in saved["states"]]
+    return saved
+
+
+# Returns the states saved by save_horizon() for the bars starting with prefix, in the form search_bars() takes them
+def horizon_slice(horizon: Dict[str, object], prefix: Tuple[str, ...]) -> Tuple[List[tuple], List[List[int]]]:
+    first: int = bar_rank(list(prefix) + [ability for ability in my_abilities if ability not in prefix])
+    last: int = first + math.factorial(len(my_abilities) - len(prefix))
+    states: List[tuple] = []
+    runs: List[List[int]] = []
+    local: Dict[int, int] = {}
+    position: int = 0
+    for index, bars in horizon["runs"]:
+        overlap: int = min(position + bars, last) - max(position, first)
+        if overlap > 0:
+            if index not in local:
+                local[index] = len(states)
+                states.append(horizon["states"][index])
+            runs.append([local[index], overlap])
+        position += bars
+        if position >= last:
+            break
+    return states, runs
+
+
+# Raised whenever a change to the simulator changes the damage of any bar, to drop the results stored by --cache
+simulator_revision: int = 1
+
+
+# Identifies the data tables and simulator results were found with, so stored results are dropped once any of them
+# change
+def data_version() -> str:
+    data: Dict[str, object] = {"revision": simulator_revision, "tick": tick, "abilities": abilities, "binds": binds,
+                               "attack_speed_cooldowns": attack_speed_cooldowns}
+    data.update(base_tables)
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+# Identifies the current settings and engine for --cache. Unlike config_hash(), the order of the abilities does not
+# matter, and neither do settings that make no difference to any bar
+def cache_key(engine: str) -> str:
+    settings: Dict[str, object] = current_settings()
+    settings.update(engine=engine, my_abilities=sorted(my_abilities), debilitating=sorted(debilitating),
+                    activate_bleeds=str(activate_bleeds).lower())
+    if len(aoe) == 0:
+        settings["aoe_average_targets_hit"] = 1.0
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+
+# Opens the result store at path for --cache, creating it if needed, and drops results found with other data tables
+def open_cache(path: str) -> sqlite3.Connection:
+    connection: sqlite3.Connection = sqlite3.connect(path)
+    with connection:
+        connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, version TEXT, settings TEXT, "
+                           "top INTEGER, bottom INTEGER, results TEXT)")
+        connection.execute("DELETE FROM results WHERE version != ?", (data_version(),))
+    return connection
+
+
+# Loads the stored results of a complete search with the current settings and engine into results, rotations
+# included. Returns False if there are none, or if they list fewer bars than --top or --bottom ask for
+def load_cached(connection: sqlite3.Connection, engine: str, results: Dict[str, object]) -> bool:
+    row = connection.execute("SELECT top, bottom, results FROM results WHERE key = ? AND version = ?",
+                             (cache_key(engine), data_version())).fetchone()
+    if row is None or row[0] < results["top"].size or row[1] < results["bottom"].size:
+        return False
+    stored: Dict[str, object] = json.loads(row[2])
+    results.update({key: stored[key] for key in checkpoint_keys})
+    results.update(best_rotation=stored["best_rotation"], worst_rotation=stored["worst_rotation"])
+    rotations: Dict[str, List[str]] = stored["rotations"]
+    for board in ("top", "bottom"):
+        for damage_dealt, bar, count in stored[board]:
+            results[board].offer(damage_dealt, bar, count)
+        results[board + "_rotations"] = [rotations[",".join(bar)] for _, bar, _ in results[board].entries()]
+    return True
+
+
+# Stores the results of a complete search, after record_rotations(), under the current settings and engine
+def store_cached(connection: sqlite3.Connection, engine: str, results: Dict[str, object]) -> None:
+    stored: Dict[str, object] = {key: results[key] for key in checkpoint_keys}
+    stored.update(best_rotation=results["best_rotation"], worst_rotation=results["worst_rotation"], rotations={})
+    for board in ("top", "bottom"):
+        stored[board] = results[board].entries()
+        for (_, bar, _), rotation in zip(stored[board], results[board + "_rotations"]):
+            stored["rotations"][",".join(bar)] = rotation
+    with connection:
+        connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                           (cache_key(engine), data_version(), json.dumps(current_settings()),
+                            results["top"].size, results["bottom"].size, json.dumps(stored)))
+
+
+# Reads the configurations listed in the JSON file at path for --configs. The file holds a list of objects, each setting
+# any of config_settings by name (written as for the command line options), "Targets" for area of effect abilities and
+# an optional "Name". Settings that are left out come from overrides and then from the configuration file at base.
+# Returns the names and the settings (as made by current_settings()) of every configuration
+def load_configurations(path: str, base: str, overrides: Dict[int, str], targets: float,
+                        extra: Tuple[str, ...] = ()) -> List[Tuple[str, Dict[str, object]]]:
+    with open(path, "r") as listing:
+        entries: List[Dict[str, object]] = json.load(listing)
+    configurations: List[Tuple[str, Dict[str, object]]] = []
+    for number, entry in enumerate(entries, 1):
+        try:
+            settings: Dict[str, object] = entry_settings(entry, base, overrides, targets, extra)
+        except ValueError as error:
+            print(f"Configuration {number} in {path} has {error}.", file=sys.stderr)
+            sys.exit(1)
+        except SystemExit:
+            print(f"Configuration {number} in {path} is invalid.", file=sys.stderr)
+            raise
+        configurations.append((str(entry.get("Name", number)), settings))
+    return configurations
+
+
+# Sets up the configuration of entry (from --configs or --serve), whose settings replace those of overrides and then of
+# the configuration file at base, and returns its settings. Raises ValueError for unknown settings and targets that are
+# not a number of at least 1, other problems exit as setup_config() does. Name and the keys in extra are left alone
+def entry_settings(entry: Dict[str, object], base: str, overrides: Dict[int, str], targets: float,
+                   extra: Tuple[str, ...] = ()) -> Dict[str, object]:
+    global aoe_average_targets_hit
+    changes: Dict[int, str] = dict(overrides)
+    for setting, value in entry.items():
+        if setting in ("Name", "Targets") + extra:
+            continue
+        if setting not in config_settings:
+            raise ValueError(f"an unknown setting {setting}")
+        changes[config_settings.index(setting)] = config_value(setting, value)
+    try:
+        hit: float = float(entry.get("Targets", targets))
+    except (TypeError, ValueError):
+        raise ValueError("Targets that are not a number")
+    if not hit >= 1:
+        raise ValueError("Targets below 1")
+    setup_config(base, changes, False)
+    prepare_tables()
+    # The number of targets makes no difference without area of effect abilities
+    aoe_average_targets_hit = hit if len(aoe) > 0 else 1.0
+    return current_settings()
+
+
+# Searches every configuration listed in args.configs in this process, or in one pool shared by all of them, and
+# prints (or writes as JSON) the results of each. Identical configurations are only searched once
+def search_configurations(args: argparse.Namespace, overrides: Dict[int, str], options: Dict[str, object],
+                          stdout) -> None:
+    configurations: List[Tuple[str, Dict[str, object]]] = load_configurations(
+        args.configs, args.config, overrides, args.targets if args.targets is not None else 2.5)
+    names: Dict[str, str] = {}
+    distinct: Dict[str, Dict[str, object]] = {}
+    for name, settings in configurations:
+        names.setdefault(config_hash(settings), name)
+        distinct.setdefault(config_hash(settings), settings)
+    print(f"Searching {len(distinct)} distinct configurations of the {len(configurations)} listed ...")
+    cache: Optional[sqlite3.Connection] = open_cache(args.cache) if args.cache is not None else None
+    cached: List[str] = []
+    searched: Dict[str, Dict[str, object]] = {}
+    remaining: Dict[str, int] = {}
+    owners: List[str] = []
+    jobs: List[Tuple[str, Tuple[str, ...], Dict[str, object], Tuple[int, int], Dict[str, object]]] = []
+    for key, settings in distinct.items():
+        use_settings(settings)
+        searched[key] = new_results(args.top, args.bottom)
+        searched[key]["seconds"] = 0.0
+        if cache is not None and load_cached(cache, args.engine, searched[key]):
+            cached.append(key)
+            continue
+        prefixes: List[Tuple[str, ...]] = shard_prefixes(args.workers) if args.workers > 1 else [()]
+        jobs += [(args.engine, prefix, options, (args.top, args.bottom), settings) for prefix in prefixes]
+        owners += [key] * len(prefixes)
+        remaining[key] = len(prefixes)
+    if len(cached) > 0:
+        print(f"Found the results for {len(cached)} of them in {args.cache}.")
+    pool = None
+    if args.workers > 1:
+        pool = multiprocessing.get_context().Pool(args.workers, init_worker, (None,))
+        shards = pool.imap(search_shard, jobs)
+    else:
+        shards = map(search_shard, jobs)
+    try:
+        for key, shard in zip(owners, shards):
+            use_settings(distinct[key])  # Merging ranks the bars by the abilities of their configuration
+            merge_results(searched[key], shard)
+            searched[key]["seconds"] += shard["seconds"]
+            remaining[key] -= 1
+            if remaining[key] == 0 and args.headless is False:
+                print(f"Finished {names[key]}: best ability damage {searched[key]['highest']}%")
+        if pool is not None:
+            pool.close()
+    except KeyboardInterrupt:
+        if pool is not None:
+            pool.terminate()
+        print("\nProcess terminated!")
+        sys.exit(1)
+    except Exception:
+        if pool is not None:
+            pool.terminate()  # A worker failed, its error is raised once the pool is shut down
+        raise
+    finally:
+        if pool is not None:
+            pool.join()
+    summaries: List[Dict[str, object]] = []
+    for name, settings in configurations:
+        key = config_hash(settings)
+        use_settings(settings)
+        results: Dict[str, object] = searched[key]
+        if "top_rotations" not in results:
+            record_rotations(results)
+            if cache is not None:
+                store_cached(cache, args.engine, results)
+        print(f"\n{name}: {results['highest']}% with {results['best_bar']}, "
+              f"{results['lowest']}% with {results['worst_bar']}")
+        summary: Dict[str, object] = results_json(results, args.engine, results["seconds"])
+        summary.update(name=name, cached=key in cached)
+        summaries.append(summary)
+    if args.json == "-":
+        json.dump(summaries, stdout, indent=2)
+        stdout.write("\n")
+    elif args.json is not None:
+        with open(args.json, "w") as output:
+            json.dump(summaries, output, indent=2)
+
+
+# Runs the benchmark workloads listed in args.suite (as for --configs, plus the number of Bars of each to search, all of
+# them by default), each in a fresh worker process so that its peak memory is its own, and prints (or writes as JSON)
+# how fast the search and the simulator went
+def run_suite(args: argparse.Namespace, overrides: Dict[int, str], options: Dict[str, object], stdout) -> None:
+    with open(args.suite, "r") as listing:
+        entries: List[Dict[str, object]] = json.load(listing)
+    configurations: List[Tuple[str, Dict[str, object]]] = load_configurations(
+        args.suite, args.config, overrides, args.targets if args.targets is not None else 2.5, ("Bars",))
+    jobs: List[Tuple[str, Dict[str, object], int, Dict[str, object]]] = [
+        (args.engine, options, int(entry.get("Bars", math.factorial(len(settings["my_abilities"])))), settings)
+        for entry, (_, settings) in zip(entries, configurations)]
+    print(f"Running {len(jobs)} workloads with the {args.engine} engine ...")
+    workloads: List[Dict[str, object]] = []
+    began: float = time.perf_counter()
+    pool = multiprocessing.get_context().Pool(1, init_worker, (None,), maxtasksperchild=1)
+    try:
+        for (name, _), workload in zip(configurations, pool.imap(run_workload, jobs)):
+            workload["name"] = name
+            workloads.append(workload)
+            micro: Dict[str, float] = workload["microseconds"]
+            print(f"{name}: {workload['bars']} bars in {workload['seconds']} seconds, {workload['bars_per_second']} "
+                  f"bars/second, {workload['ticks_per_second']} ticks/second, peak memory {workload['peak_rss_mb']} MB"
+                  f"; ability_rotation() {micro['ability_rotation']} us, decision {micro['decision']} us, copy "
+                  f"{micro['copy']} us")
+        pool.close()
+    except KeyboardInterrupt:
+        pool.terminate()
+        print("\nProcess terminated!")
+        sys.exit(1)
+    except Exception:
+        pool.terminate()  # A worker failed, its error is raised once the pool is shut down
+        raise
+    finally:
+        pool.join()
+    total: float = time.perf_counter() - began
+    print(f"Ran every workload in {total:.2f} seconds.")
+    summary: Dict[str, object] = {"engine": args.engine, "options": options, "python": sys.version.split()[0],
+                                  "data_version": data_version(), "seconds": round(total, 3), "workloads": workloads}
+    if args.json == "-":
+        json.dump(summary, stdout, indent=2)
+        stdout.write("\n")
+    elif args.json is not None:
+        with open(args.json, "w") as output:
+            json.dump(summary, output, indent=2)
+
+
+# Hands out the bars from rank up to end in leases of up to size bars for --coordinator, and takes back the results of
+# each lease. A lease that is not handed in within timeout seconds (its worker failed or is too slow) is handed out
+# again, and whichever results come in first are kept. Accepted results are put in done, for the main thread to merge
+class Coordinator:
+    __slots__ = ("leases", "issued", "deadlines", "timeout", "config", "job", "lock", "done")
+
+    def __init__(self, rank: int, end: int, size: int, timeout: float, job: Dict[str, object]) -> None:
+        self.leases: List[Tuple[int, int]] = [(first, min(size, end - first)) for first in range(rank, end, size)]
+        self.issued: int = 0
+        self.deadlines: Dict[int, float] = {}  # Leases handed out and not handed in yet
+        self.timeout: float = timeout
+        self.config: str = config_hash()
+        self.job: Dict[str, object] = job
+        self.lock = threading.Lock()
+        self.done: queue.Queue = queue.Queue()
+
+    # Returns the next lease to search, or tells the worker to wait (every lease is out) or to stop (all are done)
+    def lease(self) -> Dict[str, object]:
+        with self.lock:
+            now: float = time.time()
+            if self.issued < len(self.leases):
+                number: Optional[int] = self.issued
+                self.issued += 1
+            else:
+                number = next((lease for lease, deadline in self.deadlines.items() if deadline <= now), None)
+            if number is None:
+                return {"wait": 1} if len(self.deadlines) > 0 else {"done": True}
+            self.deadlines[number] = now + self.timeout
+            first, bars = self.leases[number]
+            return dict(self.job, lease=number, rank=first, bars=bars)
+
+    # Takes the results of a lease (as made by results_state()), returns False if they were handed in already
+    def hand_in(self, number: int, state: Dict[str, object]) -> bool:
+        with self.lock:
+            if number not in self.deadlines:
+                return False
+            del self.deadlines[number]
+        self.done.put((number, state))
+        return True
+
+
+# Answers the workers of a --coordinator. Both requests are JSON posted with the hash of the settings of the worker:
+# /lease returns the next lease, /result hands in the results of one
+class LeaseHandler(http.server.BaseHTTPRequestHandler):
+    def do_POST(self) -> None:
+        coordinator: Coordinator = self.server.coordinator
+        request: Dict[str, object] = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if request.get("config") != coordinator.config:
+            status, reply = 409, {"error": "the worker was started with other settings than the coordinator"}
+        elif self.path == "/lease":
+            status, reply = 200, coordinator.lease()
+        elif self.path == "/result":
+            status, reply = 200, {"accepted": coordinator.hand_in(request["lease"], request)}
+        else:
+            status, reply = 404, {"error": f"no such request {self.path}"}
+        body: bytes = json.dumps(reply).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass  # Every lease would be logged otherwise
+
+
+# Splits HOST:PORT, as given to --coordinator and --worker
+def split_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(":")
+    return host or "localhost", int(port)
+
+
+# Searches leases handed out by the --coordinator at address until there are none left (--worker), with a pool of
+# workers processes. The settings must be the same as those of the coordinator, which checks them by their hash
+def run_worker(address: str, workers: int) -> None:
+    host, port = split_address(address)
+    config: str = config_hash()
+
+    def call(path: str, request: Dict[str, object]) -> Dict[str, object]:
+        data: bytes = json.dumps(dict(request, config=config)).encode()
+        with urllib.request.urlopen(urllib.request.Request(f"http://{host}:{port}{path}", data,
+                                                           {"Content-Type": "application/json"}), timeout=60) as reply:
+            return json.load(reply)
+
+    context = multiprocessing.get_context()
+    settings = None if context.get_start_method() == "fork" else current_settings()
+    pool = context.Pool(workers, init_worker, (settings,)) if workers > 1 else None
+    searched: int = 0
+    waited: float = 0
+    try:
+        while True:
+            try:
+                job: Dict[str, object] = call("/lease", {})
+            except urllib.error.HTTPError as error:
+                print(f"The coordinator turned this worker away: {json.load(error)['error']}.")
+                break
+            except (urllib.error.URLError, ConnectionError):
+                # --- Workers can be started before the coordinator, which goes away once every lease is done --- #
+                if searched == 0 and waited < 30:
+                    time.sleep(1)
+                    waited += 1
+                    continue
+                print("The coordinator is gone, so the search is over or was stopped." if searched > 0 else
+                      f"Could not reach a coordinator at {host}:{port}.")
+                break
+            if job.get("done") is True:
+                break
+            if "wait" in job:
+                time.sleep(job["wait"])
+                continue
+            sizes: Tuple[int, int] = (job["top"], job["bottom"])
+            results: Dict[str, object] = new_results(*sizes)
+            prefixes: List[Tuple[str, ...]] = limit_prefixes(resume_prefixes(job["rank"]), job["bars"])
+            if pool is not None:
+                for shard in pool.imap(search_shard, [(job["engine"], prefix, job["options"], sizes, None)
+                                                      for prefix in prefixes]):
+                    merge_results(results, shard)
+            else:
+                for prefix in prefixes:
+                    engines[job["engine"]](prefix, results, None, **job["options"])
+            state: Dict[str, object] = results_state(results)
+            state.update(lease=job["lease"], transpositions={key: results[key] for key in
+                                                             ("memo_lookups", "memo_hits", "memo_evictions")})
+            try:
+                accepted: bool = call("/result", state)["accepted"]
+            except (urllib.error.URLError, ConnectionError):
+                print("The coordinator is gone, so the search is over or was stopped.")
+                break
+            searched += 1
+            print(f"Lease {job['lease'] + 1}: searched {job['bars']} ability bars from bar {job['rank'] + 1}, best "
+                  f"{results['highest']}%" + ("." if accepted else ", but another worker handed it in first."))
+    except KeyboardInterrupt:
+        print("\nProcess terminated!")
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    print(f"Searched {searched} leases.")
+
+
+# Finished jobs of --serve kept for their results, the oldest are forgotten first
+kept_jobs: int = 1000
+
+
+# Entry point of the worker processes of --serve, searches every ability bar of one job and returns its results as for
+# --json. Progress goes back through messages, and once the number of the job is put in cancelled the search stops the
+# same way as Control C, with the results of the bars searched so far
+def service_search(job: Tuple[int, str, Dict[str, object], Tuple[int, int], Dict[str, object], object, object]
+                   ) -> Dict[str, object]:
+    number, engine, options, sizes, settings, messages, cancelled = job
+    use_settings(settings)
+    results: Dict[str, object] = new_results(*sizes)
+    started: float = time.time()
+
+    def report(progress: Dict[str, object]) -> None:
+        if number in cancelled:
+            raise KeyboardInterrupt
+        messages.put((number, progress["bars"], progress["highest"], progress["best_bar"]))
+
+    stopped: bool = False
+    with open(os.devnull, "w") as silent, contextlib.redirect_stdout(silent):  # New best bars are sent as messages
+        try:
+            engines[engine]((), results, report, **options)
+        except KeyboardInterrupt:
+            stopped = True
+    record_rotations(results)
+    summary: Dict[str, object] = results_json(results, engine, time.time() - started)
+    summary["cancelled"] = stopped
+    return summary
+
+
+# A search submitted to --serve, shared by every identical request submitted while it is queued or running. events
+# holds the new best bars found so far and how the job went, and each queue in listeners gets the events still to come
+class ServiceJob:
+    __slots__ = ("number", "key", "settings", "sizes", "total", "state", "bars", "highest", "best_bar", "events",
+                 "listeners", "summary", "error", "started", "ended")
+
+    def __init__(self, number: int, key: str, settings: Dict[str, object], sizes: Tuple[int, int],
+                 total: int) -> None:
+        self.number: int = number
+        self.key: str = key
+        self.settings: Dict[str, object] = settings
+        self.sizes: Tuple[int, int] = sizes
+        self.total: int = total
+        self.state: str = "queued"  # Then running, and at last done, cancelled or failed
+        self.bars: int = 0
+        self.highest: float = 0
+        self.best_bar: Optional[List[str]] = None
+        self.events: List[Dict[str, object]] = []
+        self.listeners: List[asyncio.Queue] = []
+        self.summary: Optional[Dict[str, object]] = None
+        self.error: Optional[str] = None
+        self.started: Optional[float] = None
+        self.ended: Optional[float] = None
+
+    # How far the job has got, for GET /jobs/ID
+    def status(self) -> Dict[str, object]:
+        elapsed: float = (self.ended or time.time()) - self.started if self.started is not None else 0.0
+        rate: float = self.bars / elapsed if elapsed > 0 else 0.0
+        return {"job": self.number, "state": self.state, "bars": self.bars, "total": self.total,
+                "percent": round(self.bars / self.total * 100, 3), "best": self.highest, "best_bar": self.best_bar,
+                "elapsed_seconds": round(elapsed, 3),
+                "eta_seconds": round((self.total - self.bars) / rate, 1) if rate > 0 and self.state == "running"
+                else None, "error": self.error}
+
+    # Keeps event and passes it on to the listeners
+    def publish(self, event: Dict[str, object]) -> None:
+        event.update(job=self.number, time=round(time.time(), 3))
+        self.events.append(event)
+        for listener in self.listeners:
+            listener.put_nowait(event)
+
+
+# Writes an HTTP response to writer, with a JSON body unless reply is None (the body then follows until the connection
+# is closed)
+def write_response(writer: asyncio.StreamWriter, status: int, reply: object,
+                   content_type: str = "application/json") -> None:
+    body: bytes = json.dumps(reply).encode() if reply is not None else b""
+    length: str = f"Content-Length: {len(body)}\r\n" if reply is not None else ""
+    writer.write(f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}\r\nContent-Type: {content_type}\r\n{length}"
+                 f"Connection: close\r\n\r\n".encode() + body)
+
+
+# Runs the jobs of --serve. Requests are answered on the event loop, jobs wait in a queue of at most queue_size jobs
+# until one of the processes of pool is free, and the progress of the running jobs comes back through messages
+class JobService:
+    __slots__ = ("engine", "options", "sizes", "base", "overrides", "targets", "workers", "queue_size", "pool",
+                 "messages", "cancelled", "waiting", "jobs", "inflight", "finished", "submitted")
+
+    def __init__(self, args: argparse.Namespace, overrides: Dict[int, str], options: Dict[str, object], pool,
+                 messages, cancelled) -> None:
+        self.engine: str = args.engine
+        self.options: Dict[str, object] = options
+        self.sizes: Tuple[int, int] = (args.top, args.bottom)
+        self.base: str = args.config
+        self.overrides: Dict[int, str] = overrides
+        self.targets: float = args.targets if args.targets is not None else 2.5
+        self.workers: int = args.workers
+        self.queue_size: int = args.queue_size
+        self.pool = pool
+        self.messages = messages  # Progress of the running jobs, from the worker processes
+        self.cancelled = cancelled  # Numbers of the running jobs to stop, read by the worker processes
+        self.waiting: Optional[asyncio.Queue] = None  # Made on the event loop
+        self.jobs: Dict[int, ServiceJob] = {}
+        self.inflight: Dict[str, ServiceJob] = {}  # Queued and running jobs, by their settings and sizes
+        self.finished: collections.deque = collections.deque()
+        self.submitted: int = 0
+
+    # Takes a job of the settings in the JSON object body (as an entry of --configs, plus Top and Bottom), or the job
+    # already queued or running for the same ones
+    def submit(self, body: bytes) -> Tuple[int, Dict[str, object]]:
+        try:
+            entry: Dict[str, object] = json.loads(body)
+        except ValueError:
+            return 400, {"error": "the request is not JSON"}
+        if not isinstance(entry, dict):
+            return 400, {"error": "the request must be a JSON object of settings"}
+        try:
+            sizes: Tuple[int, int] = (int(entry.get("Top", self.sizes[0])), int(entry.get("Bottom", self.sizes[1])))
+        except (TypeError, ValueError):
+            return 400, {"error": "Top and Bottom must be whole numbers"}
+        if min(sizes) < 1:
+            return 400, {"error": "Top and Bottom must be at least 1"}
+        output: io.StringIO = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                settings: Dict[str, object] = entry_settings(entry, self.base, self.overrides, self.targets,
+                                                             ("Top", "Bottom"))
+        except ValueError as error:
+            return 400, {"error": f"the configuration has {error}"}
+        except SystemExit:
+            return 400, {"error": "the configuration is invalid", "problems": [
+                line for line in output.getvalue().splitlines() if line != "" and line != "Errors were found!!!"]}
+        key: str = f"{config_hash(settings)}/{sizes[0]}/{sizes[1]}"
+        if key in self.inflight:
+            return 200, dict(self.inflight[key].status(), coalesced=True)
+        if sum(job.state == "queued" for job in self.inflight.values()) >= self.queue_size:
+            return 503, {"error": f"the queue of {self.queue_size} waiting jobs is full, try again later"}
+        self.submitted += 1
+        job: ServiceJob = ServiceJob(self.submitted, key, settings, sizes, math.factorial(len(my_abilities)))
+        self.jobs[job.number] = job
+        self.inflight[key] = job
+        self.waiting.put_nowait(job)
+        return 202, dict(job.status(), coalesced=False)
+
+    # Cancels job straight away when it is still queued, or stops its search at the next report when it is running
+    def cancel(self, job: ServiceJob) -> Tuple[int, Dict[str, object]]:
+        if job.state == "queued":
+            self.finish(job, "cancelled")
+            return 200, job.status()
+        if job.state != "running":
+            return 409, {"error": f"job {job.number} is {job.state} already"}
+        self.cancelled[job.number] = True
+        if self.inflight.get(job.key) is job:
+            del self.inflight[job.key]  # Requests from now on get a job of their own
+        return 202, dict(job.status(), cancelling=True)
+
+    # Ends job in state, and forgets the oldest finished jobs once more than kept_jobs are kept
+    def finish(self, job: ServiceJob, state: str) -> None:
+        job.state = state
+        job.ended = time.time()
+        self.cancelled.pop(job.number, None)
+        if self.inflight.get(job.key) is job:
+            del self.inflight[job.key]
+        job.publish({"event": state, "bars": job.bars, "best": job.highest, "best_bar": job.best_bar})
+        self.finished.append(job.number)
+        while len(self.finished) > kept_jobs:
+            del self.jobs[self.finished.popleft()]
+
+    # Searches the queued jobs one at a time in a process of the pool, workers of these run side by side
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job: ServiceJob = await self.waiting.get()
+            if job.state != "queued":  # Cancelled while it was waiting
+                continue
+            job.state = "running"
+            job.started = time.time()
+            job.publish({"event": "started"})
+            outcome: asyncio.Future = loop.create_future()
+            self.pool.apply_async(service_search, ((job.number, self.engine, self.options, job.sizes, job.settings,
+                                                    self.messages, self.cancelled),),
+                                  callback=lambda summary: loop.call_soon_threadsafe(outcome.set_result, summary),
+                                  error_callback=lambda error: loop.call_soon_threadsafe(outcome.set_result, error))
+            summary: object = await outcome
+            if isinstance(summary, BaseException):
+                job.error = f"{type(summary).__name__}: {summary}"
+                self.finish(job, "failed")
+                continue
+            job.summary = summary
+            job.bars = summary["bars_evaluated"]
+            if summary["best"] is not None and summary["best"]["damage"] > job.highest:
+                job.highest, job.best_bar = summary["best"]["damage"], summary["best"]["bar"]
+                job.publish({"event": "best", "bars": job.bars, "best": job.highest, "best_bar": job.best_bar})
+            self.finish(job, "cancelled" if summary["cancelled"] is True else "done")
+
+    # Takes in the progress sent by the worker processes, until None is sent when the service stops
+    async def pump(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            message: Optional[tuple] = await loop.run_in_executor(None, self.messages.get)
+            if message is None:
+                return
+            number, bars, highest, best_bar = message
+            job: Optional[ServiceJob] = self.jobs.get(number)
+            if job is None or job.state != "running":
+                continue
+            job.bars = bars
+            if highest > job.highest:
+                job.highest, job.best_bar = highest, best_bar
+                job.publish({"event": "best", "bars": bars, "best": highest, "best_bar": best_bar})
+
+    # Sends the events of job as lines of JSON, first those so far and then the others as they come, until it ends
+    async def stream(self, job: ServiceJob, writer: asyncio.StreamWriter) -> None:
+        write_response(writer, 200, None, "application/x-ndjson")
+        for event in job.events:
+            writer.write((json.dumps(event) + "\n").encode())
+        await writer.drain()
+        if job.ended is not None:
+            return
+        listener: asyncio.Queue = asyncio.Queue()
+        job.listeners.append(listener)
+        try:
+            while True:
+                event: Dict[str, object] = await listener.get()
+                writer.write((json.dumps(event) + "\n").encode())
+                await writer.drain()
+                if event["event"] in ("done", "cancelled", "failed"):
+                    return
+        finally:
+            job.listeners.remove(listener)
+
+    # Answers one HTTP request: POST /jobs submits a job, GET /jobs lists them, GET /jobs/ID shows the progress of one,
+    # DELETE /jobs/ID cancels it, GET /jobs/ID/events streams its events and GET /jobs/ID/results returns its results
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request: List[str] = (await reader.readline()).decode("latin-1").split()
+            headers: Dict[str, str] = {}
+            while True:
+                line: str = (await reader.readline()).decode("latin-1").strip()
+                if line == "":
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body: bytes = await reader.readexactly(int(headers.get("content-length", 0)))
+            if len(request) < 2:
+                return
+            method: str = request[0]
+            parts: List[str] = request[1].split("?")[0].strip("/").split("/")
+            job: Optional[ServiceJob] = None
+            if parts[0] == "jobs" and len(parts) in (2, 3) and parts[1].isdigit():
+                job = self.jobs.get(int(parts[1]))
+            action: Tuple[str, ...] = (method,) + tuple(parts[2:])
+            if parts == ["jobs"] and method == "POST":
+                status, reply = self.submit(body)
+            elif parts == ["jobs"] and method == "GET":
+                status, reply = 200, [job.status() for job in self.jobs.values()]
+            elif job is None and len(parts) in (2, 3) and parts[0] == "jobs":
+                status, reply = 404, {"error": f"no such job {parts[1]}"}
+            elif job is not None and action == ("GET",):
+                status, reply = 200, job.status()
+            elif job is not None and action == ("DELETE",):
+                status, reply = self.cancel(job)
+            elif job is not None and action == ("GET", "events"):
+                await self.stream(job, writer)
+                return
+            elif job is not None and action == ("GET", "results"):
+                if job.summary is not None:
+                    status, reply = 200, dict(job.summary, job=job.number, state=job.state)
+                else:
+                    status, reply = 409, {"error": f"job {job.number} is {job.state}, it has no results"}
+            else:
+                status, reply = 404, {"error": f"no such request {method} {request[1]}"}
+            write_response(writer, status, reply)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # The client went away or sent something that is not HTTP
+        except asyncio.CancelledError:
+            pass  # The service is stopping
+        finally:
+            writer.close()
+
+    # Answers requests at address until the service is stopped
+    async def serve(self, address: str) -> None:
+        self.waiting = asyncio.Queue()
+        tasks: List[asyncio.Task] = [asyncio.ensure_future(self.run()) for _ in range(self.workers)]
+        tasks.append(asyncio.ensure_future(self.pump()))
+        server = await asyncio.start_server(self.handle, *split_address(address))
+        print(f"Taking jobs at http://{address}/jobs, searching {self.workers} at a time with the {self.engine} "
+              f"engine. Press Control C to stop.")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.messages.put(None)  # Lets the thread waiting for messages go
+            self.pool.terminate()
+
+
+# Searches the jobs submitted over HTTP at args.serve with a pool of args.workers processes until Control C (--serve)
+def run_service(args: argparse.Namespace, overrides: Dict[int, str], options: Dict[str, object]) -> None:
+    context = multiprocessing.get_context()
+    manager = multiprocessing.managers.SyncManager(ctx=context)
+    manager.start(signal.signal, (signal.SIGINT, signal.SIG_IGN))  # Stopped below, after the workers
+    pool = context.Pool(args.workers, init_worker, (None,))
+    try:
+        asyncio.run(JobService(args, overrides, options, pool, manager.Queue(), manager.dict()).serve(args.serve))
+    except KeyboardInterrupt:
+        print("\nService stopped.")
+    finally:
+        pool.terminate()
+        pool.join()
+        manager.shutdown()
+
+
+# Converts raw seconds into Years, Weeks, etc...
+def get_time(seconds: int) -> str:
+    years: int = int(seconds / 31449600)
+    seconds -= years * 31449600
+    weeks: int = int(seconds / 604800)
+    seconds -= weeks * 604800
+    days: int = int(seconds / 86400)
+    seconds -= days * 86400
+    hours: int = int(seconds / 3600)
+    seconds -= hours * 3600
+    minutes: int = int(seconds / 60)
+    seconds -= minutes * 60
+    eta: str = f"{years} years, {weeks} weeks, {days} days, {hours} hours, {minutes} minutes and {seconds} seconds."
+    return eta
+
+
+# Keeps track of how far a search has got, out of total bars, for the progress line and --progress-json. The speed is
+# a moving average of the bars per second between reports, where older reports fade out over about smoothing seconds,
+# and gives the time remaining. update() may be called as often as wanted, but only reports once interval seconds have
+# passed since the last report. On a terminal the progress line is rewritten in place, otherwise (when the output is
+# logged) every report gets a line of its own. stream gets every report as a line of JSON
+class Progress:
+    __slots__ = ("total", "interval", "smoothing", "show", "stream", "started", "reported", "reported_bars", "rate",
+                 "rewrite")
+
+    def __init__(self, total: int, interval: float, show: bool, stream=None, done: int = 0,
+                 smoothing: float = 30) -> None:
+        self.total = total
+        self.interval = interval
+        self.smoothing = smoothing
+        self.show = show
+        self.stream = stream
+        self.started: float = time.monotonic()
+        self.reported: float = self.started
+        self.reported_bars: int = done  # Bars already done when the search started (when resuming) are not counted
+        self.rate: Optional[float] = None
+        self.rewrite: bool = False  # Whether the progress line on the terminal is still to be ended
+
+    def update(self, bars: int, highest: float, force: bool = False, event: str = "progress") -> None:
+        now: float = time.monotonic()
+        if force is False and now - self.reported < self.interval:
+            return
+        if now > self.reported:
+            rate: float = (bars - self.reported_bars) / (now - self.reported)
+            weight: float = 1 - math.exp(-(now - self.reported) / self.smoothing)
+            self.rate = rate if self.rate is None else self.rate + weight * (rate - self.rate)
+        self.reported = now
+        self.reported_bars = bars
+        remaining: Optional[float] = (self.total - bars) / self.rate if self.rate else None
+        percent: float = round(bars / self.total * 100, 3) if self.total > 0 else 100.0
+        if self.show is True and event == "progress":
+            line: str = (f"===== {percent}% ===== {bars} bars at {self.rate or 0:.0f} bars/second, estimated time "
+                         f"remaining: {get_time(int(remaining)) if remaining is not None else 'unknown'}; Best found: "
+                         f"{highest}%")
+            if sys.stdout.isatty():
+                print("\r" + line + (" " * 22), end="", flush=True)
+                self.rewrite = True
+            else:
+                print(line, flush=True)
+        if self.stream is not None:
+            record: Dict[str, object] = {"event": event, "time": round(time.time(), 3),
+                                         "elapsed": round(now - self.started, 3), "bars": bars, "total": self.total,
+                                         "percent": percent,
+                                         "bars_per_second": round(self.rate, 1) if self.rate is not None else None,
+                                         "eta_seconds": round(remaining, 1) if remaining is not None else None,
+                                         "best": highest}
+            self.stream.write(json.dumps(record) + "\n")
+            self.stream.flush()
+
+    # Reports the end of the search straight away, and ends the progress line
+    def finish(self, bars: int, highest: float) -> None:
+        self.update(bars, highest, True, "done")
+        if self.rewrite is True:
+            print()
+            self.rewrite = False
+
+
+# Returns the parser of the command line options
+def argument_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Generates RuneScape ability bars for use with Revolution++.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="number of processes to search with (default: the number of CPUs)")
+    parser.add_argument("--engine", choices=sorted(engines), default="permutations",
+                        help="permutations simulates every ability bar separately, tree shares the simulation of "
+                             "bars with the same first priorities, traces simulates each distinct rotation once, batch "
+                             "simulates thousands of bars at once with NumPy (default: permutations)")
+    parser.add_argument("--bound", action="store_true",
+                        help="skip branches that can not beat the best or worst bar found so far (tree and traces "
+                             "engines only)")
+    parser.add_argument("--dominance", action="store_true",
+                        help="only search the bars that put each ability ahead of the abilities it dominates (at "
+                             "least as much damage, and the same type, time to use and cooldown with no side "
+                             "effects), and list those pairs")
+    parser.add_argument("--transpositions", type=float, metavar="MB",
+                        help="share the rest of rotations that reach the same point through a transposition table of "
+                             "at most MB megabytes per process (permutations and tree engines only)")
+    parser.add_argument("--benchmark", type=int, metavar="BARS",
+                        help="time the first BARS ability bars with the batch engine against the permutations engine, "
+                             "then exit")
+    parser.add_argument("--checkpoint", metavar="FILE",
+                        help="save the progress of the search to FILE regularly and when it is stopped")
+    parser.add_argument("--checkpoint-interval", type=float, default=60, metavar="SECONDS",
+                        help="seconds between checkpoints (default: 60)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the search saved in the --checkpoint file")
+    parser.add_argument("--top", type=int, default=1, metavar="K",
+                        help="list the K best ability bars (default: 1)")
+    parser.add_argument("--bottom", type=int, default=1, metavar="K",
+                        help="list the K worst ability bars (default: 1)")
+    parser.add_argument("--config", default="Configurations.txt", metavar="PATH",
+                        help="read the settings from PATH (default: Configurations.txt)")
+    settings_group = parser.add_argument_group("settings", "replace the settings of the configuration file")
+    settings_group.add_argument("--adrenaline", help="adrenaline at the start, 0 to 100")
+    settings_group.add_argument("--gain", help="adrenaline after using an ultimate, 0 to 100")
+    settings_group.add_argument("--attack-speed", help="slowest, slow, average, fast or fastest")
+    settings_group.add_argument("--bleeds", help="true or false")
+    settings_group.add_argument("--stuns", help="true or false")
+    settings_group.add_argument("--abilities", help='abilities separated by commas, e.g. "ASSAULT, BARGE, SLICE"')
+    settings_group.add_argument("--style", help='combat style and hands, e.g. "melee,2"')
+    settings_group.add_argument("--time", help="length of the rotation")
+    settings_group.add_argument("--units", help="seconds or ticks")
+    parser.add_argument("--targets", type=float, metavar="N",
+                        help="average targets hit by area of effect abilities (asked for when needed otherwise)")
+    parser.add_argument("--headless", action="store_true",
+                        help="never wait for input and do not show progress, for running from scripts")
+    parser.add_argument("--json", metavar="FILE",
+                        help="also write the results as JSON to FILE, or to standard output with - (everything else "
+                             "is then printed to standard error)")
+    parser.add_argument("--configs", metavar="FILE",
+                        help="search every configuration listed in the JSON file FILE in one process or pool, without "
+                             "asking for anything")
+    parser.add_argument("--cache", metavar="FILE",
+                        help="reuse the results of earlier searches with the same settings stored in the SQLite "
+                             "database FILE, and store new ones there")
+    parser.add_argument("--progress-interval", type=float, default=5, metavar="SECONDS",
+                        help="seconds between progress reports (default: 5)")
+    parser.add_argument("--progress-json", metavar="FILE",
+                        help="also write every progress report as a line of JSON to FILE, or to the file descriptor N "
+                             "with fd:N")
+    parser.add_argument("--instrument", action="store_true",
+                        help="count what the simulator does (loop iterations, auto attacks, idle ticks and cooldown "
+                             "updates) and time each phase of the run, reported at the end")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="profile the search with cProfile, show the functions it spent the most time in and save "
+                             "the statistics to FILE for pstats (only the main process is profiled)")
+    parser.add_argument("--suite", metavar="FILE",
+                        help="run the benchmark workloads listed in the JSON file FILE (such as "
+                             "benchmarks/workloads.json) with --engine, one process at a time, and report their speed")
+    parser.add_argument("--solve", action="store_true",
+                        help="after the search, find the best possible rotation when abilities are picked by hand and "
+                             "how far the best bar falls short of it (can take long, Control C stops it)")
+    distributed_group = parser.add_argument_group("distributed search", "search on several machines, each worker "
+                                                                        "started with the same settings as the "
+                                                                        "coordinator")
+    distributed_group.add_argument("--coordinator", metavar="HOST:PORT",
+                                   help="hand out the ability bars in leases to workers connecting to HOST:PORT, and "
+                                        "merge their results")
+    distributed_group.add_argument("--worker", metavar="HOST:PORT",
+                                   help="search the leases of the coordinator at HOST:PORT with --workers processes "
+                                        "until none are left")
+    distributed_group.add_argument("--lease-bars", type=int, default=1000000, metavar="N",
+                                   help="ability bars in each lease (default: 1000000)")
+    distributed_group.add_argument("--lease-timeout", type=float, default=600, metavar="SECONDS",
+                                   help="hand a lease out again when it is not done after SECONDS (default: 600)")
+    service_group = parser.add_argument_group("job service", "take searches submitted over HTTP, for tools that would "
+                                                             "run the calculator once per search otherwise")
+    service_group.add_argument("--serve", metavar="HOST:PORT",
+                               help="take jobs at HOST:PORT (settings as for --configs) and search them with "
+                                    "--workers processes, one job each, until Control C")
+    service_group.add_argument("--queue-size", type=int, default=16, metavar="N",
+                               help="turn jobs away while N jobs are waiting for a process (default: 16)")
+    parser.add_argument("--horizons", metavar="SECONDS",
+                        help="also find the best and worst ability bars over each of these shorter times, separated by "
+                             "commas, from the same simulation of each bar (permutations engine only)")
+    parser.add_argument("--save-horizon", metavar="FILE",
+                        help="save the state of every ability bar shortly before the end of the rotation to FILE, so "
+                             "that --extend can carry them on for a longer time")
+    parser.add_argument("--extend", metavar="FILE",
+                        help="carry every ability bar on from the states saved with --save-horizon in FILE, for a time "
+                             "at least as long as theirs, instead of simulating them from the start")
+    limit_group = parser.add_argument_group("limits", "stop searching early with the best bars found so far")
+    limit_group.add_argument("--anytime", action="store_true",
+                             help="reorder the abilities so that the most promising bars are searched first")
+    limit_group.add_argument("--budget", type=float, metavar="SECONDS",
+                             help="stop searching after SECONDS (each --heuristic search takes 60 seconds unless "
+                                  "--evaluations is given)")
+    limit_group.add_argument("--evaluations", type=int, metavar="N",
+                             help="stop searching after N bars (in each search with --heuristic)")
+    heuristic_group = parser.add_argument_group("heuristic search", "search part of the bars when there are too many "
+                                                                      "to test them all")
+    heuristic_group.add_argument("--heuristic", choices=("annealing", "genetic"),
+                                 help="search with simulated annealing or a genetic algorithm, one search per worker")
+    heuristic_group.add_argument("--seed", type=int, metavar="N",
+                                 help="seed of the first search, the others use the following seeds (random otherwise)")
+    return parser
+
+
+# Options that every way of running the calculator takes, by their name in args: the settings and how they are given
+setting_options: Tuple[str, ...] = ("config", "adrenaline", "gain", "attack_speed", "bleeds", "stuns", "abilities",
+                                    "style", "time", "units", "targets", "headless")
+# Options of a search of the bars of one configuration, in this process or handed out with --coordinator
+search_options: Tuple[str, ...] = ("engine", "bound", "dominance", "transpositions", "top", "bottom", "json", "cache",
+                                   "checkpoint", "checkpoint_interval", "resume", "progress_interval", "progress_json",
+                                   "instrument", "profile", "solve", "anytime", "budget", "evaluations")
+# Options each way of running the calculator takes besides the settings, in the order they are picked in when more than
+# one is given. search is the search of the bars of the configuration, when none of the others is given
+mode_options: Dict[str, Tuple[str, ...]] = {
+    "configs": ("configs", "workers", "engine", "bound", "transpositions", "top", "bottom", "json", "cache"),
+    "suite": ("suite", "engine", "bound", "transpositions", "json"),
+    "serve": ("serve", "workers", "engine", "bound", "transpositions", "top", "bottom", "queue_size"),
+    "worker": ("worker", "workers", "anytime", "dominance"),
+    "benchmark": ("benchmark",),
+    "heuristic": ("heuristic", "seed", "workers", "transpositions", "top", "bottom", "json", "progress_interval",
+                  "progress_json", "instrument", "profile", "solve", "anytime", "budget", "evaluations"),
+    "coordinator": ("coordinator", "lease_bars", "lease_timeout") + search_options,
+    "search": ("workers", "horizons", "save_horizon", "extend") + search_options}
+
+
+# Returns the way of running the calculator that args asks for, a key of mode_options
+def run_mode(args: argparse.Namespace) -> str:
+    for mode in mode_options:
+        if mode != "search" and getattr(args, mode) is not None:
+            return mode
+    return "search"
+
+
+# Checks the options of args and exits through parser.error at the first problem. Each mode only takes its own options
+# of mode_options, as any other would be ignored, and those must fit together. The --horizons are turned into a sorted
+# list of seconds
+def check_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    mode: str = run_mode(args)
+    for name, value in vars(args).items():
+        if name in setting_options or name in mode_options[mode] or value == parser.get_default(name):
+            continue
+        option: str = "--" + name.replace("_", "-")
+        if mode != "search":
+            parser.error(f"{option} can not be used with --{mode}")
+        modes: List[str] = ["--" + other for other in mode_options if other != "search" and name in mode_options[other]]
+        parser.error(f"{option} needs {' or '.join(modes)}")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.bound and args.engine not in ("tree", "traces"):
+        parser.error("--bound needs --engine tree or --engine traces")
+    if args.transpositions is not None and (args.engine not in ("permutations", "tree") or args.transpositions <= 0):
+        parser.error("--transpositions needs a positive size and --engine permutations or --engine tree")
+    if (args.engine == "batch" or mode == "benchmark") and np is None:
+        parser.error("the batch engine needs NumPy (pip install numpy)")
+    if (args.resume or args.checkpoint_interval != parser.get_default("checkpoint_interval")) and (
+            args.checkpoint is None):
+        parser.error("--resume and --checkpoint-interval need --checkpoint FILE")
+    if args.top < 1 or args.bottom < 1:
+        parser.error("--top and --bottom must be at least 1")
+    if args.targets is not None and args.targets < 1:
+        parser.error("--targets must be at least 1")
+    if (args.budget is not None and args.budget <= 0) or (args.evaluations is not None and args.evaluations < 1):
+        parser.error("--budget and --evaluations must be positive")
+    if args.progress_interval <= 0:
+        parser.error("--progress-interval must be positive")
+    if args.queue_size < 1:
+        parser.error("--queue-size must be at least 1")
+    if args.lease_bars < 1 or args.lease_timeout <= 0:
+        parser.error("--lease-bars and --lease-timeout must be positive")
+    for address in (args.coordinator, args.worker, args.serve):
+        if address is not None and not address.rpartition(":")[2].isdigit():
+            parser.error(f"{address} is not an address of the form HOST:PORT")
+    # --- Bars can only be carried on to or from other times when each is simulated on its own from the start --- #
+    if (args.save_horizon is not None or args.extend is not None) and (
+            args.engine != "permutations" or args.checkpoint is not None or args.cache is not None or args.dominance or
+            args.transpositions is not None):
+        parser.error("--save-horizon and --extend need --engine permutations, and can not be used with --checkpoint, "
+                     "--cache, --dominance or --transpositions")
+    if args.extend is not None and args.anytime:
+        parser.error("--extend keeps the order the abilities were saved in, so it can not be used with --anytime")
+    if args.horizons is not None:
+        if (args.engine != "permutations" or args.checkpoint is not None or args.cache is not None or
+                args.transpositions is not None or args.save_horizon is not None or args.extend is not None):
+            parser.error("--horizons needs --engine permutations, and can not be used with --checkpoint, --cache, "
+                         "--transpositions, --save-horizon or --extend")
+        try:
+            args.horizons = sorted(float(seconds) for seconds in args.horizons.split(","))
+        except ValueError:
+            parser.error("--horizons must be times in seconds separated by commas, e.g. 30,60,120")
+        if args.horizons[0] <= 0:
+            parser.error("--horizons must be positive")
+
+
+# Reads the settings, asking for what is not given unless headless, and lays out the tables of the abilities
+def read_settings(parser: argparse.ArgumentParser, args: argparse.Namespace, overrides: Dict[int, str]) -> None:
+    setup_config(args.config, overrides, not args.headless)
+    # --- Dictionaries, lists and other data types laid out here --- #
+    print("Starting process ...")
+    prepare_tables()
     # Define the amount of targets affected by area of effect attacks
     aoe_average_targets_hit: float = 2.5
     # --- Gets rotation length --- #
-    while True:
+    if args.targets is not None:
+        aoe_average_targets_hit = args.targets
+    elif args.headless is True and len(aoe) > 0:
+        parser.error("--headless needs --targets when area of effect abilities are selected")
+    while args.targets is None and args.headless is False:
         try:
             if len(aoe) > 0:  # Only ask if AoE abilities are in my_abilities
                 aoe_average_targets_hit = float(input("How many targets on average will your AoE abilities hit? "))
@@ -1270,58 +4192,473 @@ def main() -> None:
             break
         except:
             print("Invalid Input.")
-    if aoe_average_targets_hit > 1:
-        for ability in my_abilities:
-            if ability in aoe:
-                ability_damage[ability] = ability_damage[ability] * aoe_average_targets_hit
-    print("Startup Complete! Warning, the more the abilities, and the higher the cycle time, the more time it will take"
-          " to process. A better processor will improve this speed.")
-    choice: str = input("Start Calculations? (Y/N) ").upper()
-    if (choice != "Y") and (choice != "YES"):
-        sys.exit()
-    # --- Calculations start here --- #
-    start: int = int(time.time())  # Record time since epoch (UTC) (in seconds)
+    scale_aoe(aoe_average_targets_hit)
+    convert_tables()
+    compile_table()
+
+
+# Sets options up to carry the bars on to or from other times: the pause of --save-horizon and the shorter times of
+# --horizons in ticks. Returns the states saved for a shorter time to carry on from with --extend
+def carry_horizons(parser: argparse.ArgumentParser, args: argparse.Namespace,
+                   options: Dict[str, object]) -> Optional[Dict[str, object]]:
+    # --- Bars carry on from the states saved for a shorter time --- #
+    horizon: Optional[Dict[str, object]] = None
+    if args.extend is not None:
+        horizon = load_horizon(args.extend)
+        if horizon is None:
+            parser.error(f"{args.extend} was saved with other settings")
+        if horizon["until"] + horizon_margin() > cycle_ticks:
+            parser.error(f"{args.extend} was saved at {round(horizon['until'] * tick, 1)} seconds, it can only be "
+                         f"extended to {round((horizon['until'] + horizon_margin()) * tick, 1)} seconds or longer")
+        print(f"Carrying on the ability bars saved in {args.extend} from {round(horizon['until'] * tick, 1)} "
+              f"seconds, in {len(horizon['states'])} distinct states.")
+    if args.save_horizon is not None:
+        options["until"] = max(math.floor(cycle_ticks - horizon_margin()), 0)
+    # --- Shorter times are kept track of in the same simulations, in whole ticks where they fall on one --- #
+    if args.horizons is not None:
+        horizon_ticks: List[float] = [round(seconds / tick) if abs(seconds / tick - round(seconds / tick)) < 1e-6
+                                      else seconds / tick for seconds in args.horizons]
+        if horizon_ticks[-1] >= cycle_ticks:
+            parser.error(f"--horizons must be shorter than the time of the rotation, {round(cycle_ticks * tick, 1)} "
+                         f"seconds")
+        options["horizons"] = horizon_ticks
+    return horizon
+
+
+# Options of the search of the bars starting with prefix, which take their saved states along with --extend
+def carried_options(options: Dict[str, object], horizon: Optional[Dict[str, object]],
+                    prefix: Tuple[str, ...]) -> Dict[str, object]:
+    if horizon is None:
+        return options
+    return dict(options, start=horizon_slice(horizon, prefix))
+
+
+# Saves the states of the bars to --save-horizon, once every bar was searched
+def save_states(args: argparse.Namespace, options: Dict[str, object], results: Dict[str, object],
+                permutation_count: int) -> None:
+    if results["bars"] == permutation_count:
+        save_horizon(args.save_horizon, results, options["until"])
+        print(f"Saved the ability bars at {round(options['until'] * tick, 1)} seconds, in {len(results['states'])} "
+              f"distinct states, to {args.save_horizon}. Carry them on for a longer time with --extend.")
+    else:
+        print(f"Not every ability bar was searched, so nothing was saved to {args.save_horizon}.")
+
+
+# Reorders the abilities for --anytime and --dominance, and shows the new order
+def order_abilities(args: argparse.Namespace) -> None:
+    if args.anytime:
+        promising_order()
+        print(f"Searching the most promising ability bars first, in the order {my_abilities}.")
+    if args.dominance:
+        dominance_order()
+        if len(dominance) == 0:
+            print("No ability dominates another, so every ability bar is searched.")
+        else:
+            print("Abilities that are searched ahead of the abilities they dominate:")
+            for ability in my_abilities:
+                dominated: List[str] = [second for first, second in dominance if first == ability]
+                if len(dominated) > 0:
+                    print(f"    {ability} before {', '.join(dominated)}")
+            print(f"{bar_count(table.ordered)} of {math.factorial(len(my_abilities))} ability bars keep to these, in "
+                  f"the order {my_abilities}.")
+
+
+# Hands the bars from rank to goal out in leases to the workers of --coordinator, and merges their results into results
+# in order
+def run_coordinator(args: argparse.Namespace, rank: int, goal: int, options: Dict[str, object],
+                    results: Dict[str, object], tracker: Progress, show: bool,
+                    checkpoint: Callable[[Dict[str, object]], None]) -> None:
+    coordinator: Coordinator = Coordinator(rank, goal, args.lease_bars, args.lease_timeout,
+                                           {"engine": args.engine, "options": options, "top": args.top,
+                                            "bottom": args.bottom})
+    server = http.server.ThreadingHTTPServer(split_address(args.coordinator), LeaseHandler)
+    server.coordinator = coordinator
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Handing out {len(coordinator.leases)} leases of up to {args.lease_bars} ability bars to workers at "
+          f"{args.coordinator} ...")
+    handed_in: Dict[int, Dict[str, object]] = {}
+    merged: int = 0
+    try:
+        while merged < len(coordinator.leases):
+            try:
+                number, state = coordinator.done.get(timeout=1)
+            except queue.Empty:
+                continue
+            handed_in[number] = state
+            while merged in handed_in:
+                shard: Dict[str, object] = new_results(args.top, args.bottom)
+                restore_results(handed_in[merged], shard)
+                shard.update(handed_in.pop(merged)["transpositions"])
+                if merge_results(results, shard) and show is True:
+                    print(f"\nNew best bar with damage {results['highest']}: {results['best_bar']}")
+                merged += 1
+                if show is True:
+                    tracker.update(results["bars"], results["highest"])
+                checkpoint(results)
+    except KeyboardInterrupt:
+        print("\nProcess terminated!")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+# Searches whole shards of the bars from rank with a pool of --workers processes, and merges their results into results
+# in order
+def run_shards(args: argparse.Namespace, rank: int, options: Dict[str, object], horizon: Optional[Dict[str, object]],
+               results: Dict[str, object], tracker: Progress, show: bool,
+               checkpoint: Callable[[Dict[str, object]], None]) -> None:
+    prefixes: List[Tuple[str, ...]] = shard_prefixes(args.workers, rank)
+    if args.evaluations is not None:
+        prefixes = limit_prefixes(prefixes, args.evaluations)
+    context = multiprocessing.get_context()
+    settings = None if context.get_start_method() == "fork" else current_settings()
+    pool = context.Pool(args.workers, init_worker, (settings, counters is not None))
+    try:
+        jobs = [(args.engine, prefix, carried_options(options, horizon, prefix), (args.top, args.bottom), None)
+                for prefix in prefixes]
+        for shard in pool.imap(search_shard, jobs):
+            if merge_results(results, shard) and show is True:
+                print(f"\nNew best bar with damage {results['highest']}: {results['best_bar']}")
+            if show is True:
+                tracker.update(results["bars"], results["highest"])
+            checkpoint(results)
+        pool.close()
+    except KeyboardInterrupt:
+        pool.terminate()
+        print("\nProcess terminated!")
+    except Exception:
+        pool.terminate()  # A worker failed, its error is raised once the pool is shut down
+        raise
+    finally:
+        pool.join()
+
+
+# Searches the bars from rank in this process. Returns the results of the bars before the first one left out in
+# permutation order, which are all of them unless the traces engine is stopped in the middle of a shard
+def run_search(args: argparse.Namespace, rank: int, options: Dict[str, object], horizon: Optional[Dict[str, object]],
+               results: Dict[str, object], report, checkpoint: Callable[[Dict[str, object]], None],
+               in_order: bool) -> Dict[str, object]:
+    if args.checkpoint is not None and in_order is False:
+        prefixes: List[Tuple[str, ...]] = shard_prefixes(1, rank)
+    else:
+        prefixes = resume_prefixes(rank)
+    if args.evaluations is not None:
+        prefixes = limit_prefixes(prefixes, args.evaluations)
+    covered: Dict[str, object] = dict(results)
     try:  # Will keep running until Control C (or other) is pressed to end process
-        for permutation in itertools.permutations(my_abilities):
-            damage_dealt: float = ability_rotation(permutation)
-            # --- Reset data ready for next ability bar to be tested
-            # and check if any better/worse bars have been found --- #
-            ability_ready = dict(copy_of_ready)
-            track_cooldown = {}
-            track_buff = {}
-            if round(damage_dealt, 1) > current_highest:
-                current_highest = round(damage_dealt, 1)
-                best_rotation = []
-                best_rotation = list(ability_path)
-                best_bar: List[str] = list(permutation)
-                print(f"New best bar with damage {current_highest}: {best_bar}")
-            if round(damage_dealt, 1) < current_lowest:
-                current_lowest = round(damage_dealt, 1)
-                worst_rotation: List[str] = []
-                worst_rotation: List[str] = list(ability_path)
-                worst_bar = list(permutation)
-            ability_path = []
-            runthrough += 1
-            # --- Time Remaining estimation calculations every 10,000 bars analysed --- #
-            if runthrough == 10000:
-                end_estimation = int(time_remaining_calculation * (time.time() - start))
-            if runthrough % 10000 == 0:
-                print(f"\r===== {round(float(runthrough / permutation_count) * 100, 3)}"
-                      f"% ===== Estimated time remaining: {get_time(int(end_estimation - (time.time() - start)))}"
-                      f"; Best found: {current_highest}%" + (" " * 22), end="")
-                time_remaining_calculation -= 1
-                end_estimation = int(time_remaining_calculation * (time.time() - start))
-                start = time.time()
+        for prefix in prefixes:
+            engines[args.engine](prefix, results, report, **carried_options(options, horizon, prefix))
+            covered = dict(results)
+            checkpoint(covered)
     except KeyboardInterrupt:
         print("\nProcess terminated!")
-    # --- Display results --- #
-    print(f"\n\nHighest ability damage: {current_highest}%")
-    print(f"Best ability bar found: {best_bar}")
-    print(f"{best_rotation}\n")
-    print(f"Lowest ability damage: {current_lowest}%")
-    print(f"Worst ability bar found: {worst_bar}")
-    print(worst_rotation)
-    input("\nPress enter to exit\n")
+        if in_order is True:
+            covered = results
+    return covered
+
+
+# Prints how many bars were searched, and how many were skipped or shared along the way
+def print_searched(args: argparse.Namespace, results: Dict[str, object], curves: List[List[Tuple[int, float, float]]],
+                   seed: int, permutation_count: int) -> None:
+    if args.heuristic is not None:
+        print(f"\n\nTested {results['bars']} ability bars in {len(curves)} searches, out of {permutation_count} "
+              f"different bars.", end="")
+        for number, curve in enumerate(curves):
+            if len(curve) > 0:
+                print(f"\nSearch {number + 1} (seed {seed + number}) reached {curve[-1][2]}% after {curve[-1][0]} "
+                      f"bars and {curve[-1][1]} seconds.", end="")
+    else:
+        print(f"\n\nSimulated {results['simulated']} rotations to cover {results['bars']} ability bars.", end="")
+        if results["bars"] < permutation_count:
+            print(f" That is {round(results['bars'] / permutation_count * 100, 3)}% of the {permutation_count} "
+                  f"ability bars.", end="")
+    if args.bound and len(dominance) > 0:
+        print(f" {results['pruned']} branches were skipped by their damage bounds or by dominance.", end="")
+    elif args.bound:
+        print(f" {results['pruned']} branches were skipped by their damage bounds.", end="")
+    elif len(dominance) > 0:
+        print(f" {results['pruned']} runs of ability bars were skipped by dominance.", end="")
+    if args.transpositions is not None:
+        print(f" The transposition table answered {results['memo_hits']} of {results['memo_lookups']} lookups, "
+              f"evicting {results['memo_evictions']} decision points.", end="")
+
+
+# --- Display results --- #
+def display_results(args: argparse.Namespace, shown: Dict[str, object]) -> None:
+    print(f"\n\nHighest ability damage: {shown['highest']}%")
+    print(f"Best ability bar found: {shown['best_bar']}")
+    if args.engine not in ("permutations", "batch"):
+        print(f"{shown['best_count']} ability bars share this rotation.")
+    print(f"{shown['best_rotation']}\n")
+    print(f"Lowest ability damage: {shown['lowest']}%")
+    print(f"Worst ability bar found: {shown['worst_bar']}")
+    if args.engine not in ("permutations", "batch"):
+        print(f"{shown['worst_count']} ability bars share this rotation.")
+    print(shown['worst_rotation'])
+    for board, title, size in (("top", "best", args.top), ("bottom", "worst", args.bottom)):
+        if size > 1:
+            print(f"\nThe {size} {title} ability bars found:")
+            for place, (damage_dealt, bar, count) in enumerate(shown[board].entries(), 1):
+                print(f"{place}. {damage_dealt}%: {bar}")
+                if args.engine not in ("permutations", "batch"):
+                    print(f"{count} ability bars share this rotation.")
+                print(shown[board + "_rotations"][place - 1])
+
+
+# Shows the results of each of the shorter times of --horizons, as for the whole time
+def display_horizons(args: argparse.Namespace, options: Dict[str, object], results: Dict[str, object]) -> None:
+    for seconds, ticks, shorter in zip(args.horizons, options["horizons"], results.get("horizons", [])):
+        record_rotations(shorter, ticks)
+        print(f"\n\n===== Over {seconds:g} seconds =====", end="")
+        display_results(args, shorter)
+
+
+# --- Compares the best bar with the best possible rotation --- #
+def run_solve(results: Dict[str, object]) -> Dict[str, object]:
+    print("\nSearching for the best possible rotation (press Control C to stop)...")
+    optimal: Dict[str, object] = solve_rotation(results["highest"])
+    if optimal["complete"] is False:
+        print("The search was stopped, so this is only the best rotation found so far.")
+    if optimal["damage"] is None:
+        print("No rotation deals more damage than the best ability bar found.")
+        optimal["gap"] = 0.0
+    else:
+        optimal["gap"] = round(optimal["damage"] - results["highest"], 1)
+        print(f"Highest possible damage: {optimal['damage']}%", end="")
+        if results["highest"] > 0:
+            print(f" ({optimal['gap']}% or {round(optimal['gap'] / results['highest'] * 100, 2)}% more than the "
+                  f"best ability bar)", end="")
+        print(f"\nAbilities used: {', '.join(optimal['abilities'])}")
+        print(optimal["rotation"])
+    print(f"The solver expanded {optimal['expanded']} decision points, cut {optimal['cut']} by their damage bounds "
+          f"and answered {optimal['reused']} from the {optimal['points']} points it kept.")
+    return optimal
+
+
+# --- Where the time went, for --instrument and --profile --- #
+def print_instrumentation(args: argparse.Namespace, profiler: Optional[cProfile.Profile], phases: Dict[str, float],
+                          searched: Dict[str, int], results: Dict[str, object]) -> None:
+    if profiler is not None:
+        profiler.dump_stats(args.profile)
+        print(f"\nProfile of the search (saved to {args.profile}):")
+        pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(15)
+    if args.instrument:
+        print("\nSeconds spent on each phase: " + ", ".join(f"{name} {seconds:.3f}" for name, seconds in
+                                                            phases.items()))
+        print(f"During the search, advance_rotation() was called {searched['calls']} times and went round its loop "
+              f"{searched['iterations']} times ({searched['iterations'] / max(results['simulated'], 1):.1f} per "
+              f"simulation), using {searched['abilities']} abilities and {searched['autos']} auto attacks and waiting "
+              f"{searched['idle']} idle ticks.")
+        scanned: float = searched["scanned"] / max(searched["adjust_cooldowns"], 1)
+        print(f"adjust_cooldowns() was called {searched['adjust_cooldowns']} times and went through "
+              f"{searched['scanned']} cooldowns and buffs ({scanned:.2f} per call).")
+        if args.engine == "batch" and args.heuristic is None:
+            print("The batch engine simulates bars with NumPy, which is not counted.")
+
+
+# Writes the results of the search, and whatever else was asked for, as JSON to --json
+def write_json(args: argparse.Namespace, stdout, results: Dict[str, object], elapsed: float, cached: bool,
+               optimal: Optional[Dict[str, object]], phases: Dict[str, float], searched: Dict[str, int],
+               curves: List[List[Tuple[int, float, float]]], seed: int) -> None:
+    summary: Dict[str, object] = results_json(results, args.engine, elapsed)
+    summary["cached"] = cached
+    if optimal is not None:
+        summary["optimal"] = optimal
+    if args.horizons is not None:
+        summary["horizons"] = []
+        for seconds, shorter in zip(args.horizons, results.get("horizons", [])):
+            found: Dict[str, object] = results_json(shorter, args.engine, elapsed)
+            summary["horizons"].append({"seconds": seconds, "best": found["best"], "worst": found["worst"],
+                                        "top": found["top"], "bottom": found["bottom"]})
+    if args.instrument:
+        summary["instrumentation"] = {"phases": {name: round(seconds, 3) for name, seconds in phases.items()},
+                                      "search_counters": searched, "counters": counters}
+    if args.heuristic is not None:
+        summary["heuristic"] = {"method": args.heuristic, "seeds": [seed + number for number in range(len(curves))],
+                                "convergence": [[{"bars": bars, "seconds": seconds, "damage": damage_dealt}
+                                                 for bars, seconds, damage_dealt in curve] for curve in curves]}
+    if args.json == "-":
+        json.dump(summary, stdout, indent=2)
+        stdout.write("\n")
+    else:
+        with open(args.json, "w") as output:
+            json.dump(summary, output, indent=2)
+
+
+def main() -> None:
+    global counters
+    parser: argparse.ArgumentParser = argument_parser()
+    args = parser.parse_args()
+    check_arguments(parser, args)
+    mode: str = run_mode(args)
+    if mode == "worker":
+        args.headless = True  # Nobody is there to answer
+    if args.instrument:
+        counters = dict.fromkeys(counter_names, 0)
+    phases: Dict[str, float] = {}
+    phase_started: float = time.perf_counter()
+    overrides: Dict[int, str] = {}
+    for position, value in enumerate((args.adrenaline, args.gain, args.attack_speed, args.bleeds, args.stuns,
+                                      args.abilities, args.style, args.time, args.units)):
+        if value is not None:
+            overrides[position] = config_value(config_settings[position], value)
+    # With --json -, standard output only gets the JSON
+    stdout = sys.stdout
+    if args.json == "-":
+        sys.stdout = sys.stderr
+    options: Dict[str, object] = {"bound": True} if args.bound else {}
+    if args.transpositions is not None:
+        options["memory"] = int(args.transpositions * 1024 * 1024)
+    if mode == "configs":
+        search_configurations(args, overrides, options, stdout)
+        return
+    if mode == "suite":
+        run_suite(args, overrides, options, stdout)
+        return
+    if mode == "serve":
+        run_service(args, overrides, options)
+        return
+
+    # Saves a checkpoint once one is due, or straight away with force. covered must hold the results of exactly the bars
+    # before its rank in permutation order
+    def checkpoint(covered: Dict[str, object], force: bool = False) -> None:
+        nonlocal checkpointed
+        if args.checkpoint is not None and (force or time.time() - checkpointed >= args.checkpoint_interval):
+            save_checkpoint(args.checkpoint, args.engine, covered)
+            checkpointed = time.time()
+
+    # Adds the time since the last phase ended to phase name, for --instrument
+    def end_phase(name: str) -> None:
+        nonlocal phase_started
+        now: float = time.perf_counter()
+        phases[name] = phases.get(name, 0) + now - phase_started
+        phase_started = now
+
+    # --- Progress and time remaining, called by the searches every report_every bars --- #
+    def report(progress: Dict[str, object]) -> None:
+        tracker.update(progress["bars"], progress["highest"])
+        if in_order is True:
+            checkpoint(progress)
+
+    read_settings(parser, args, overrides)
+    if mode == "benchmark":
+        benchmark_batch(args.benchmark)
+        return
+    permutation_count: int = math.factorial(len(my_abilities))
+    # --- Tracking of highest and lowest damaging ability bars  --- #
+    results: Dict[str, object] = new_results(args.top, args.bottom)
+    horizon: Optional[Dict[str, object]] = carry_horizons(parser, args, options)
+    order_abilities(args)
+    if mode == "worker":
+        print(f"Searching the leases of the coordinator at {args.worker} ...")
+        run_worker(args.worker, args.workers)
+        return
+    # --- Picks up a saved search where it was stopped --- #
+    rank: int = 0
+    if args.resume:
+        if not os.path.exists(args.checkpoint):
+            parser.error(f"no checkpoint found at {args.checkpoint}")
+        saved: Optional[int] = load_checkpoint(args.checkpoint, args.engine, results)
+        if saved is None:
+            parser.error(f"{args.checkpoint} was saved with other settings, another engine or other --top/--bottom")
+        rank = saved
+        print(f"Resuming from ability bar {rank + 1} of {permutation_count}.")
+    # --- Results of the same settings found before are used as they are --- #
+    cache: Optional[sqlite3.Connection] = open_cache(args.cache) if args.cache is not None else None
+    cached: bool = cache is not None and rank == 0 and load_cached(cache, args.engine, results)
+    if cached is True:
+        print(f"Found the results for these settings in {args.cache}.")
+    # The other engines cover bars in permutation order, traces only does between shards
+    in_order: bool = args.engine != "traces"
+    checkpointed: float = time.time()
+    print("Startup Complete! Warning, the more the abilities, and the higher the cycle time, the more time it will take"
+          " to process. A better processor will improve this speed.")
+    end_phase("setup")
+    if args.headless is False and cached is False:
+        choice: str = input("Start Calculations? (Y/N) ").upper()
+        if (choice != "Y") and (choice != "YES"):
+            sys.exit()
+        end_phase("input")
+    # --- Calculations start here --- #
+    began: float = time.time()  # Record time since epoch (UTC) (in seconds)
+    # --- Progress is shown unless headless, and written to --progress-json --- #
+    goal: int = permutation_count if args.evaluations is None else min(permutation_count, rank + args.evaluations)
+    progress_stream = None
+    if args.progress_json is not None and args.progress_json.startswith("fd:"):
+        progress_stream = open(int(args.progress_json[3:]), "w", closefd=False)
+    elif args.progress_json is not None:
+        progress_stream = open(args.progress_json, "w")
+    tracker: Progress = Progress(goal, args.progress_interval, args.headless is False, progress_stream, rank)
+    progress = report if args.headless is False or progress_stream is not None else None
+    curves: List[List[Tuple[int, float, float]]] = []
+    seed: int = args.seed if args.seed is not None else random.randrange(2 ** 32)
+
+    # Stops the search the same way as Control C
+    def expire() -> None:
+        print(f"\nThe budget of {args.budget} seconds has run out.")
+        _thread.interrupt_main()
+
+    timer: Optional[threading.Timer] = None
+    if args.budget is not None and mode != "heuristic" and cached is False:
+        timer = threading.Timer(args.budget, expire)
+        timer.daemon = True
+        timer.start()
+    profiler: Optional[cProfile.Profile] = cProfile.Profile() if args.profile is not None else None
+    if profiler is not None:
+        profiler.enable()
+    if cached is True:
+        covered: Dict[str, object] = results
+    elif mode == "heuristic":
+        seeds: str = str(seed) if args.workers == 1 else f"{seed} to {seed + args.workers - 1}"
+        print(f"Searching with {args.heuristic} from seed {seeds} ...")
+        curves = run_heuristic(args, seed, options, results, progress)
+        covered = results
+    elif mode == "coordinator":
+        # --- Workers elsewhere search leases of bars, which are merged back in order --- #
+        run_coordinator(args, rank, goal, options, results, tracker, progress is not None, checkpoint)
+        covered = results
+    elif args.workers > 1 and len(my_abilities) > 1:
+        # --- Each worker searches whole shards, which are merged back in order --- #
+        run_shards(args, rank, options, horizon, results, tracker, progress is not None, checkpoint)
+        covered = results
+    else:
+        covered = run_search(args, rank, options, horizon, results, progress, checkpoint, in_order)
+    if timer is not None:
+        timer.cancel()
+    if profiler is not None:
+        profiler.disable()
+    if mode != "heuristic" and cached is False:
+        tracker.finish(results["bars"], results["highest"])
+    if progress_stream is not None:
+        progress_stream.close()
+    end_phase("search")
+    searched: Dict[str, int] = dict(counters) if counters is not None else {}
+    if args.checkpoint is not None:
+        checkpoint(covered, True)
+        if covered["bars"] < permutation_count:
+            print(f"Progress saved to {args.checkpoint}, continue with --resume.")
+    if args.save_horizon is not None:
+        save_states(args, options, results, permutation_count)
+    elapsed: float = time.time() - began
+    if cached is False:
+        record_rotations(results)
+        if cache is not None and results["bars"] == permutation_count:
+            store_cached(cache, args.engine, results)
+        end_phase("rotations")
+    print_searched(args, results, curves, seed, permutation_count)
+    display_results(args, results)
+    # --- The same for each of the shorter times of --horizons --- #
+    if args.horizons is not None:
+        display_horizons(args, options, results)
+    optimal: Optional[Dict[str, object]] = None
+    if args.solve:
+        optimal = run_solve(results)
+        end_phase("solve")
+    print_instrumentation(args, profiler, phases, searched, results)
+    if args.json is not None:
+        write_json(args, stdout, results, elapsed, cached, optimal, phases, searched, curves, seed)
+    if args.headless is False:
+        input("\nPress enter to exit\n")
 
 
 # Execute main() function
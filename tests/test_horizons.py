@@ -0,0 +1,76 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+from typing import List, Tuple
+
+script: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "Revolution Rotation Calculator.py")
+# Abilities of every style, mixed freely like the calculator allows
+pool: List[str] = ["ASSAULT", "DESTROY", "SLICE", "BARGE", "SEVER", "HAVOC", "BACKHAND", "DISMEMBER", "BERSERK",
+                   "SMOKE TENDRILS", "RAPID FIRE", "STORM SHARDS", "SHATTER", "CHAIN", "HORROR", "TSUNAMI", "UNLOAD",
+                   "GREATER BARGE", "BLOOD TENDRILS (S)", "SNAP SHOT", "PIERCING SHOT", "WRACK", "COMBUST",
+                   "SUNSHINE", "DRAGON BREATH", "ASPHYXIATE"]
+
+
+# Runs the calculator without input and returns the best and worst damage, then those of each horizon
+def search(settings: List[str], *extra: str) -> Tuple[Tuple[float, float], List[Tuple[float, float]]]:
+    done = subprocess.run([sys.executable, script, "--headless", "--workers", "1", "--json", "-"] + settings +
+                          list(extra), capture_output=True, text=True, cwd=tempfile.gettempdir())
+    if done.returncode != 0:
+        raise AssertionError(done.stderr)
+    results = json.loads(done.stdout)
+    return ((results["best"]["damage"], results["worst"]["damage"]),
+            [(horizon["best"]["damage"], horizon["worst"]["damage"]) for horizon in results.get("horizons", [])])
+
+
+# Settings for the calculator, apart from the time
+def configuration(abilities: List[str], adrenaline: int, gain: int, attack_speed: str, bleeds: str, stuns: str,
+                  style: str) -> List[str]:
+    return ["--abilities", ",".join(abilities), "--adrenaline", str(adrenaline), "--gain", str(gain),
+            "--attack-speed", attack_speed, "--bleeds", bleeds, "--stuns", stuns, "--style", style, "--targets", "3",
+            "--units", "seconds"]
+
+
+# Bars carried on from a shorter time (--horizons, --save-horizon and --extend) must deal what they deal when
+# simulated on their own
+class HorizonTest(unittest.TestCase):
+    cases: List[Tuple[List[str], float, float]] = [
+        (configuration(["SMOKE TENDRILS", "RAPID FIRE", "STORM SHARDS"], 0, 10, "slowest", "false", "true", "melee,2"),
+         40, 45.3),
+        (configuration(["CHAIN", "STORM SHARDS", "HORROR"], 0, 10, "slow", "false", "false", "melee,2"), 16.5, 19.1),
+        (configuration(["TSUNAMI", "UNLOAD", "GREATER BARGE", "BLOOD TENDRILS (S)"], 50, 0, "slow", "true", "false",
+                       "ranged,1"), 8.7, 12.9)]
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        rng = random.Random(2024)
+        for _ in range(12):
+            short: float = round(rng.uniform(5, 40), 1)
+            cls.cases.append((configuration(rng.sample(pool, rng.randint(2, 4)), rng.choice([0, 30, 50, 100]),
+                                            rng.choice([0, 10]),
+                                            rng.choice(["slowest", "slow", "average", "fast", "fastest"]),
+                                            rng.choice(["true", "false"]), rng.choice(["true", "false"]),
+                                            rng.choice(["melee,2", "ranged,1", "magic,2"])),
+                              short, round(short + rng.uniform(0.1, 8), 1)))
+
+    def test_horizons_match_separate_searches(self) -> None:
+        for settings, short, long in self.cases:
+            with self.subTest(settings=settings, short=short, long=long):
+                _, horizons = search(settings, "--time", str(long), "--horizons", str(short))
+                self.assertEqual(horizons, [search(settings, "--time", str(short))[0]])
+
+    def test_extend_matches_direct_search(self) -> None:
+        for settings, short, long in self.cases:
+            with self.subTest(settings=settings, short=short, long=long), tempfile.TemporaryDirectory() as folder:
+                saved: str = os.path.join(folder, "horizon.json")
+                search(settings, "--time", str(short), "--save-horizon", saved)
+                extended, _ = search(settings, "--time", str(long), "--extend", saved)
+                self.assertEqual(extended, search(settings, "--time", str(long))[0])
+
+
+if __name__ == "__main__":
+    unittest.main()